@@ -0,0 +1,195 @@
+"""Conditional GET support for the dynamic API.
+
+The ETag of a response is derived from the request, the dataset schema version
+and the data version of the tables that the response reads.
+This allows clients (e.g. dashboards that poll every minute) to revalidate their
+cached response with ``If-None-Match``, without running the actual data queries.
+
+The data version of a table is an explicit value in the Django cache
+(see ``DSO_DATA_VERSION_CACHE``). It's replaced once a transaction that writes
+to the table is committed, and by the ``bump_data_version`` management command
+that import jobs run after loading new data.
+"""
+import hashlib
+from functools import lru_cache, partial
+from typing import Dict, Iterable, Set, Tuple, Type, Union
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.cache import get_conditional_response
+from schematools.contrib.django.models import DynamicModel
+from schematools.contrib.django.signals import dynamic_models_removed
+from schematools.utils import toCamelCase
+
+from dso_api.dynamic_api.serializers import MAX_EMBED_NESTING_LEVEL
+from rest_framework_dso.embedding import group_dotted_names
+
+VERSION_KEY_PREFIX = "dso_api:data_version:"
+
+
+def _clear_caches(**kwargs):
+    """When models are removed, clear the cache."""
+    get_model_tables.cache_clear()
+
+
+def _data_changed(sender, instance, using, action="post", **kwargs):
+    """Replace the data version once the transaction that wrote to the table is committed."""
+    if isinstance(instance, DynamicModel) and action.startswith("post"):
+        db_table = sender._meta.db_table
+        transaction.on_commit(partial(bump_data_version, [db_table]), using=using)
+
+
+# Using functions, as the signals only keep a weak reference to their receivers.
+dynamic_models_removed.connect(_clear_caches)
+post_save.connect(_data_changed)
+post_delete.connect(_data_changed)
+m2m_changed.connect(_data_changed)
+
+
+def get_etag(
+    request, models: Iterable[Type[DynamicModel]], expand_scope: Union[bool, list] = False
+) -> str:
+    """Generate the (weak) ETag for a response that reads from the given models.
+
+    Besides the data, the response also depends on the requested format,
+    the coordinate reference system and the scopes of the user.
+    """
+    models = list(models)
+    tables = sorted({table for model in models for table in get_read_tables(model, expand_scope)})
+    parts = [
+        get_normalized_url(request),
+        request.META.get("HTTP_ACCEPT", ""),
+        request.META.get("HTTP_ACCEPT_CRS", ""),
+        ",".join(sorted(getattr(request, "get_token_scopes", None) or ())),
+        *sorted({model._dataset_schema.version or "" for model in models}),
+        get_data_version(tables),
+    ]
+    digest = hashlib.md5("\n".join(parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def get_normalized_url(request) -> str:
+    """Return the request path with a sorted query string,
+    so the same query with a different parameter ordering gives the same ETag.
+    """
+    return f"{request.path}?{urlencode(sorted(request.GET.lists()), doseq=True)}"
+
+
+def get_cache():
+    return caches[getattr(settings, "DSO_DATA_VERSION_CACHE", "default")]
+
+
+def get_data_version(db_tables: Iterable[str]) -> str:
+    """Tell which version of the data the tables have.
+    A table receives a new version when it's first seen (or evicted from the cache),
+    which only causes cached results to be generated again.
+    """
+    cache = get_cache()
+    keys = {f"{VERSION_KEY_PREFIX}{db_table}": db_table for db_table in db_tables}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, uuid4().hex, None)
+        versions[key] = cache.get(key, "")
+
+    return ",".join(f"{keys[key]}:{versions[key]}" for key in sorted(keys))
+
+
+def bump_data_version(db_tables: Iterable[str]):
+    """Give the tables a new data version, so ETags and cached results are no longer used."""
+    get_cache().set_many(
+        {f"{VERSION_KEY_PREFIX}{db_table}": uuid4().hex for db_table in db_tables}, None
+    )
+
+
+def get_read_tables(model: Type[Model], expand_scope: Union[bool, list]) -> Set[str]:
+    """Find the database tables that a response for the model reads,
+    including the objects that are embedded by ``?_expand=true`` or ``?_expandScope=...``.
+    """
+    return _get_expanded_tables(
+        model,
+        group_dotted_names(expand_scope) if isinstance(expand_scope, list) else expand_scope,
+        MAX_EMBED_NESTING_LEVEL,
+    )
+
+
+def _get_expanded_tables(
+    model: Type[Model], expand_tree: Union[bool, Dict[str, dict]], depth: int
+) -> Set[str]:
+    tables = set(get_model_tables(model))
+    if not expand_tree or depth <= 0:
+        return tables
+
+    for field, related_model in _get_related_models(model):
+        if expand_tree is True:
+            sub_tree = True
+        else:
+            sub_tree = expand_tree.get(toCamelCase(field.name), expand_tree.get(field.name))
+            if sub_tree is None:
+                continue
+
+        tables.update(_get_expanded_tables(related_model, sub_tree, depth - 1))
+    return tables
+
+
+@lru_cache()
+def get_model_tables(model: Type[Model]) -> Tuple[str, ...]:
+    """Find the database tables that a response for the model reads, without embedding.
+    The related tables are included, as their identifiers appear in the links.
+    """
+    tables = {model._meta.db_table}
+    tables.update(related._meta.db_table for _, related in _get_related_models(model))
+    return tuple(sorted(tables))
+
+
+def _get_related_models(model: Type[Model]):
+    """Tell which models are related to this model, including many-to-many tables."""
+    for field in model._meta.get_fields():
+        try:
+            # Also covers the LooseRelationField, which is not a real relation.
+            related_model = getattr(field, "related_model", None)
+        except LookupError:
+            continue  # loose relation to a model that doesn't exist.
+
+        if related_model is not None and not isinstance(related_model, str):
+            yield field, related_model
+
+        through = getattr(field, "through", None) or getattr(field.remote_field, "through", None)
+        if through is not None and not isinstance(through, str):
+            yield field, through
+
+
+class ConditionalGetMixin:
+    """Add ETag support to views that are not based on the REST Framework
+    (e.g. the MVT and WFS views).
+    """
+
+    def get_etag_models(self) -> Iterable[Type[DynamicModel]]:
+        """Tell which models the response is based on.
+        By default, this is the ``model`` or ``queryset.model`` of the view.
+        """
+        model = getattr(self, "model", None)
+        if model is not None:
+            return [model]
+
+        queryset = getattr(self, "queryset", None)
+        if queryset is None:
+            raise ImproperlyConfigured(
+                f"{self.__class__.__name__} should define a model, queryset or get_etag_models()"
+            )
+        return [queryset.model]
+
+    def get(self, request, *args, **kwargs):
+        etag = get_etag(request, self.get_etag_models())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+        return response
@@ -6,17 +6,16 @@ from django.conf import settings
 from more_ds.network.url import URL
 from more_itertools import first
 from rest_framework import serializers
-from rest_framework.reverse import reverse
 from schematools.contrib.django.models import DynamicModel
 from schematools.types import Temporal
 from schematools.utils import to_snake_case
 
-from rest_framework_dso.fields import LinksField
+from rest_framework_dso.fields import LinksField, URLTemplateMixin, template_reverse
 
 from .utils import split_on_separator
 
 
-class TemporalHyperlinkedRelatedField(serializers.HyperlinkedRelatedField):
+class TemporalHyperlinkedRelatedField(URLTemplateMixin, serializers.HyperlinkedRelatedField):
     """Temporal Hyperlinked Related Field
 
     Used for forward relations in serializers."""
@@ -165,7 +164,7 @@ class LooseRelationUrlField(serializers.CharField):
         # We force that the incoming value is interpreted as the
         # pk, although this is not always the 'real' pk, e.g. for temporal relations
         kwargs = {"pk": value}
-        return reverse(
+        return template_reverse(
             f"{app_name}:{dataset_name}-{table_name}-detail",
             kwargs=kwargs,
             request=request,
@@ -0,0 +1,18 @@
+from django.core.management import BaseCommand
+
+from dso_api.dynamic_api.etags import bump_data_version
+
+
+class Command(BaseCommand):
+    """Give the tables a new data version after an import.
+    This makes sure the ETags, cached responses and cached counts are no longer used.
+    """
+
+    help = "Give the tables a new data version, after their data is imported."
+
+    def add_arguments(self, parser):
+        parser.add_argument("db_tables", nargs="+", metavar="TABLE", help="Database table names")
+
+    def handle(self, *args, **options):
+        bump_data_version(options["db_tables"])
+        self.stdout.write(f"Updated the data version of: {', '.join(options['db_tables'])}")
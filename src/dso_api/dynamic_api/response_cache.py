@@ -0,0 +1,103 @@
+"""A cache for complete API responses.
+
+Many identical requests are made for the same (public) tables, which produce the same
+response every time. Responses are cached in the configured Django ``CACHES`` backend.
+
+The cache key is based on the ETag of the request (see :mod:`~dso_api.dynamic_api.etags`),
+which already includes the normalized URL, the user scopes and the data version of the tables.
+Hence, an entry is no longer used once the data changes. When the router reloads its
+models, the generation number is increased, so all existing entries are no longer used.
+
+Only small responses are cached, these are collected while they are streamed to the client.
+HTML pages are never cached, as these contain the CSRF token and login details of the user.
+"""
+import hashlib
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from rest_framework_dso.response import StreamingResponse, get_accepted_encoding
+
+GENERATION_KEY = "dso_api:response_cache:generation"
+
+
+def is_enabled() -> bool:
+    """Tell whether the response cache is enabled."""
+    return settings.DSO_RESPONSE_CACHE_TIMEOUT > 0
+
+
+def is_cacheable(request) -> bool:
+    """Tell whether the response can be cached. This is only the case for data formats,
+    not for HTML pages (e.g. the browsable API) that contain details of the user.
+    """
+    return getattr(request.accepted_renderer, "cacheable", False)
+
+
+def get_cache():
+    return caches[settings.DSO_RESPONSE_CACHE]
+
+
+def get_cache_key(request, etag: str) -> str:
+    """Generate the cache key for the response.
+    The host and scheme are included, as the response contains absolute URLs.
+    """
+    renderer_format = request.accepted_renderer.format
+    encoding = get_accepted_encoding(request.META.get("HTTP_ACCEPT_ENCODING")) or "identity"
+    generation = get_cache().get(GENERATION_KEY, 0)
+    base_url = f"{request.scheme}://{request.get_host()}"
+    digest = hashlib.md5(f"{base_url}\n{renderer_format}\n{encoding}\n{etag}".encode()).hexdigest()
+    return f"dso_api:response_cache:{generation}:{digest}"
+
+
+def get_cached_response(cache_key: str) -> Optional[HttpResponse]:
+    """Return the cached response, if it exists."""
+    cached = get_cache().get(cache_key)
+    if cached is None:
+        return None
+
+    headers, content = cached
+    response = HttpResponse(content)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def cache_response(response: StreamingResponse, cache_key: str) -> StreamingResponse:
+    """Make sure the response is stored in the cache once it's completely streamed."""
+    response.streaming_content = _collect_stream(
+        response.streaming_content, cache_key, headers=dict(response.items())
+    )
+    return response
+
+
+def _collect_stream(stream: Iterator[bytes], cache_key: str, headers: dict) -> Iterator[bytes]:
+    """Collect the streamed response, and store it in the cache when it's small enough.
+    Nothing is stored when the stream is aborted by an exception.
+    """
+    chunks = []
+    size = 0
+    for chunk in stream:
+        if chunks is not None:
+            size += len(chunk)
+            if size > settings.DSO_RESPONSE_CACHE_MAX_SIZE:
+                chunks = None  # too large, stop collecting
+            else:
+                chunks.append(chunk)
+        yield chunk
+
+    if chunks is not None:
+        get_cache().set(
+            cache_key, (headers, b"".join(chunks)), settings.DSO_RESPONSE_CACHE_TIMEOUT
+        )
+
+
+def clear():
+    """Make sure all cached responses are no longer used."""
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key doesn't exist yet, or expired.
+        cache.add(GENERATION_KEY, 1, timeout=None)
@@ -34,6 +34,7 @@ from schematools.contrib.django.factories import remove_dynamic_models
 from schematools.contrib.django.models import Dataset
 from schematools.utils import to_snake_case
 
+from dso_api.dynamic_api import response_cache
 from dso_api.dynamic_api.datasets import get_active_datasets
 from dso_api.dynamic_api.locking import lock_for_writing
 from dso_api.dynamic_api.openapi import get_openapi_json_view
@@ -46,6 +47,7 @@ from dso_api.dynamic_api.views import (
     DatasetWFSView,
     viewset_factory,
 )
+from rest_framework_dso import embedding
 
 logger = logging.getLogger(__name__)
 reload_counter = 0
@@ -409,6 +411,10 @@ class DynamicRouter(routers.DefaultRouter):
         # Refresh URLConf in urls.py
         urls.refresh_urls(self)
 
+        # Cached responses and objects may no longer match the new models.
+        response_cache.clear()
+        embedding.clear_shared_cache()
+
         # Return which models + urls were generated
         result = {}
         for model in models:
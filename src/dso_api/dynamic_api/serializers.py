@@ -8,9 +8,10 @@ in the DSO base classes as those classes are completely generic.
 """
 from __future__ import annotations
 
+import copy
 import re
 from functools import lru_cache, wraps
-from typing import Any, Callable, List, Optional, Tuple, Type, Union, cast
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union, cast
 from urllib.parse import quote, urlencode
 
 from django.core.exceptions import ImproperlyConfigured
@@ -20,10 +21,10 @@ from django.db.models.fields.reverse_related import ForeignObjectRel
 from django.utils.functional import cached_property
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
+from lru import LRU
 from more_itertools import first
 from rest_framework import serializers
 from rest_framework.relations import HyperlinkedRelatedField
-from rest_framework.reverse import reverse
 from rest_framework.serializers import Field, ManyRelatedField
 from schematools.contrib.django.factories import is_dangling_model
 from schematools.contrib.django.models import (
@@ -49,10 +50,23 @@ from dso_api.dynamic_api.fields import (
 from dso_api.dynamic_api.permissions import filter_unauthorized_expands
 from dso_api.dynamic_api.utils import resolve_model_lookup
 from rest_framework_dso.embedding import EmbeddedFieldMatch
-from rest_framework_dso.fields import AbstractEmbeddedField, EmbeddedField, EmbeddedManyToManyField
-from rest_framework_dso.serializers import DSOModelListSerializer, DSOModelSerializer
+from rest_framework_dso.fields import (
+    AbstractEmbeddedField,
+    EmbeddedField,
+    EmbeddedManyToManyField,
+    template_reverse,
+)
+from rest_framework_dso.serializers import (
+    DSOModelListSerializer,
+    DSOModelSerializer,
+    clear_fields_cache,
+)
 
 MAX_EMBED_NESTING_LEVEL = 2
+MAX_FIELD_PLANS = 1000
+
+# The outcome of DynamicSerializer.get_fields(), see _get_field_plan_key() for the keys.
+_field_plans = LRU(MAX_FIELD_PLANS)
 
 
 class URLencodingURLfields:
@@ -124,7 +138,7 @@ class DynamicLinksField(TemporalLinksField):
 class _RelatedSummaryField(Field):
     def to_representation(self, value: models.Manager):
         request = self.context["request"]
-        url = reverse(get_view_name(value.model, "list"), request=request)
+        url = template_reverse(get_view_name(value.model, "list"), request=request)
         filter_field = next(iter(value.core_filters.keys()))
         q_params = {toCamelCase(filter_field + "_id"): value.instance.pk}
 
@@ -203,6 +217,9 @@ class DynamicSerializer(DSOModelSerializer):
 
     id_based_fetcher = staticmethod(temporal_id_based_fetcher)
 
+    # The schema URL is generated from the model metadata.
+    metadata_method_fields = ("schema",)
+
     def get_request(self):
         """
         Get request from this or parent instance.
@@ -210,17 +227,49 @@ class DynamicSerializer(DSOModelSerializer):
         return self.context["request"]
 
     def get_fields(self):
-        """Remove fields that shouldn't be part of the response."""
+        """Remove fields that shouldn't be part of the response.
+
+        The outcome is the same for all requests with the same field selection and scopes,
+        hence it's cached. As fields are bound to their serializer, the cached fields are copied.
+        """
+        plan_key = self._get_field_plan_key()
+        if plan_key is None:
+            plan = self._get_field_plan()
+        else:
+            if (cached_plan := _field_plans.get(plan_key)) is None:
+                cached_plan = _field_plans[plan_key] = self._get_field_plan()
+            plan = {
+                field_name: (copy.deepcopy(field), transform_function)
+                for field_name, (field, transform_function) in cached_plan.items()
+            }
+
+        fields = {}
+        for field_name, (field, transform_function) in plan.items():
+            if transform_function is not None:
+                # Value must be transformed, decorate to_representation() for it.
+                # Fields are a deepcopy, so this doesn't affect other serializer instances.
+                # This strategy also avoids having to dig into the response data afterwards.
+                field.to_representation = self._apply_transform(
+                    field.to_representation, transform_function
+                )
+
+            fields[field_name] = field
+
+        return fields
+
+    def _get_field_plan(self) -> Dict[str, Tuple[Field, Optional[Callable[[Json], Json]]]]:
+        """Tell which fields may be included, and which transformation their value needs."""
         user_scopes = self.get_request().user_scopes
         model = self.Meta.model
 
-        # See what fields should really be included.
-        fields = {}
-        for field_name, field in super().get_fields().items():
+        # See what fields should really be included. The fields are built directly,
+        # as the plan is already cached (instead of DSOSerializer.get_fields()).
+        plan = {}
+        for field_name, field in self._build_fields(self.get_inline_embeds()).items():
             if field.source == "*":
                 # e.g. _links field, always include. These sub serializers
                 # do their own permission checks for their fields.
-                fields[field_name] = field
+                plan[field_name] = (field, None)
                 continue
 
             # field.source can be None as this point, because Field.bind() is not called yet.
@@ -228,17 +277,43 @@ class DynamicSerializer(DSOModelSerializer):
             field_schema = get_field_schema(model_field)
             if permission := user_scopes.has_field_access(field_schema):
                 # field has permission
-                if transform_function := permission.transform_function():
-                    # Value must be transformed, decorate to_representation() for it.
-                    # Fields are a deepcopy, so this doesn't affect other serializer instances.
-                    # This strategy also avoids having to dig into the response data afterwards.
-                    field.to_representation = self._apply_transform(
-                        field.to_representation, transform_function
-                    )
+                plan[field_name] = (field, permission.transform_function())
 
-                fields[field_name] = field
+        return plan
 
-        return fields
+    def _get_field_plan_key(self) -> Optional[tuple]:
+        """Tell which requests receive the same fields from :meth:`get_fields`.
+
+        The user scopes are constructed from the token scopes, the query parameters
+        (profiles can require a set of filters) and the profiles that are loaded on startup.
+        """
+        request = self.get_request()
+        token_scopes = getattr(request, "get_token_scopes", None)
+        if token_scopes is None:
+            return None  # user scopes are not constructed by the middleware (e.g. in tests)
+
+        # Profiles are matched against the query parameters that have a value,
+        # detail views also consider their identifier to be a query parameter.
+        query_param_names = {name for name, values in request.GET.lists() if any(values)}
+        view = self.context.get("view")
+        if getattr(view, "action", None) == "retrieve":
+            query_param_names.update(view.table_schema.identifier)
+
+        return (
+            self.__class__,
+            tuple(self.fields_to_display or ()),
+            tuple(embed_match.name for embed_match in self.get_inline_embeds()),
+            frozenset(token_scopes),
+            frozenset(query_param_names),
+        )
+
+    def _has_custom_representation(self) -> bool:
+        """The URL fields and loose relations are only handled by to_representation()."""
+        return (
+            type(self).to_representation is not DynamicSerializer.to_representation
+            or bool(self._url_content_fields)
+            or bool(self._loose_relation_m2m_fields)
+        )
 
     @staticmethod
     def _apply_transform(
@@ -355,7 +430,7 @@ class DynamicSerializer(DSOModelSerializer):
 
                 data[camel_name] = [
                     {
-                        "href": reverse(url_name, kwargs={"pk": item}, request=request),
+                        "href": template_reverse(url_name, kwargs={"pk": item}, request=request),
                         "title": item,
                         related_identifier_field: item,
                     }
@@ -473,8 +548,15 @@ class ThroughSerializer(DynamicSerializer):
         return representation
 
 
-# When models are removed, clear the cache.
-dynamic_models_removed.connect(lambda **kwargs: serializer_factory.cache_clear())
+def _clear_caches(**kwargs):
+    """When models are removed, clear the caches."""
+    serializer_factory.cache_clear()
+    _field_plans.clear()
+    clear_fields_cache()
+
+
+# Using a function, as the signal only keeps a weak reference to its receivers.
+dynamic_models_removed.connect(_clear_caches)
 
 
 @lru_cache()
@@ -12,7 +12,7 @@ and model layer of this application.
 """
 from __future__ import annotations
 
-from typing import Iterable, List, Type
+from typing import Iterable, List, Optional, Type
 
 from django.db import models
 from django.http import Http404, JsonResponse
@@ -24,10 +24,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from schematools.contrib.django.models import Dataset, DynamicModel
 
-from dso_api.dynamic_api import filterset, locking, permissions, serializers
+from dso_api.dynamic_api import etags, filterset, locking, permissions, response_cache, serializers
 from dso_api.dynamic_api.datasets import get_active_datasets
 from rest_framework_dso import fields
+from rest_framework_dso.embedding import parse_expand_scope
 from rest_framework_dso.renderers import BrowsableAPIRenderer, HALJSONRenderer
+from rest_framework_dso.response import StreamingResponse
 from rest_framework_dso.views import DSOViewMixin
 
 
@@ -146,6 +148,48 @@ class DynamicApiViewSet(
 
         return super().paginator
 
+    def get_etag(self, request) -> Optional[str]:
+        """The ETag changes when the schema version or the data of the read tables changes."""
+        expand_scope = parse_expand_scope(
+            request.GET.get(serializers.DynamicSerializer.expand_all_param),
+            request.GET.get(serializers.DynamicSerializer.expand_param),
+        )
+        return etags.get_etag(request, [self.model], expand_scope)
+
+    def get_data_version(self, db_tables) -> str:
+        """The cached pagination counts are invalidated once the tables have a new data version."""
+        return etags.get_data_version(db_tables)
+
+    def get_conditional_response(self, request):
+        """Return the response from the cache, if it exists."""
+        response = super().get_conditional_response(request)
+        if (
+            response is None
+            and request.response_etag is not None
+            and response_cache.is_enabled()
+            and response_cache.is_cacheable(request)
+        ):
+            request.response_cache_key = response_cache.get_cache_key(
+                request, request.response_etag
+            )
+            response = response_cache.get_cached_response(request.response_cache_key)
+
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Store the streaming response in the cache while it's being sent."""
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        cache_key = getattr(request, "response_cache_key", None)
+        if (
+            cache_key is not None
+            and response.status_code == 200
+            and isinstance(response, StreamingResponse)
+        ):
+            response = response_cache.cache_response(response, cache_key)
+
+        return response
+
 
 def _get_viewset_api_docs(model: Type[DynamicModel]) -> str:
     """Generate the API documentation header for the viewset."""
@@ -15,6 +15,7 @@ from schematools.utils import to_snake_case
 from vectortiles.postgis.views import MVTView
 
 from dso_api.dynamic_api.datasets import get_active_datasets
+from dso_api.dynamic_api.etags import ConditionalGetMixin
 from dso_api.dynamic_api.permissions import CheckPermissionsMixin
 from dso_api.dynamic_api.views import APIIndexView
 
@@ -85,7 +86,7 @@ class DatasetMVTSingleView(TemplateView):
         return context
 
 
-class DatasetMVTView(CheckPermissionsMixin, MVTView):
+class DatasetMVTView(CheckPermissionsMixin, ConditionalGetMixin, MVTView):
     """An MVT view for a single dataset."""
 
     def setup(self, request, *args, **kwargs):
@@ -41,6 +41,7 @@ from gisserver.views import WFSView
 from schematools.contrib.django.models import Dataset, get_field_schema
 
 from dso_api.dynamic_api.datasets import get_active_datasets
+from dso_api.dynamic_api.etags import ConditionalGetMixin
 from dso_api.dynamic_api.permissions import CheckPermissionsMixin
 from dso_api.dynamic_api.views import APIIndexView
 from rest_framework_dso import crs
@@ -117,7 +118,7 @@ class DatasetWFSIndexView(APIIndexView):
         return related_apis
 
 
-class DatasetWFSView(CheckPermissionsMixin, WFSView):
+class DatasetWFSView(CheckPermissionsMixin, ConditionalGetMixin, WFSView):
     """A WFS view for a single dataset.
 
     This extends the logic of django-gisserver to expose the dynamically generated
@@ -158,6 +159,10 @@ class DatasetWFSView(CheckPermissionsMixin, WFSView):
         embed = request.GET.get("embed", "")
         self.embed_fields = set(embed.split(",")) if embed else set()
 
+    def get_etag_models(self):
+        """All tables of the dataset can be part of the response."""
+        return self.models.values()
+
     def get_index_context_data(self, **kwargs):
         """Context data for the HTML root page"""
         expandable_fields = set()
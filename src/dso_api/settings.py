@@ -316,6 +316,10 @@ REST_FRAMEWORK = dict(
         "rest_framework_dso.renderers.HALJSONRenderer",
         "rest_framework_dso.renderers.CSVRenderer",
         "rest_framework_dso.renderers.GeoJSONRenderer",
+        "rest_framework_dso.renderers.FlatGeobufRenderer",
+        "rest_framework_dso.renderers.NDJSONRenderer",
+        "rest_framework_dso.renderers.ArrowRenderer",
+        "rest_framework_dso.renderers.ParquetRenderer",
         "rest_framework_dso.renderers.BrowsableAPIRenderer",
     ],
     DEFAULT_FILTER_BACKENDS=[
@@ -411,6 +415,33 @@ INITIALIZE_DYNAMIC_VIEWSETS = env.bool(
 DATASETS_LIST = env.list("DATASETS_LIST", default=None)
 DATASETS_EXCLUDE = env.list("DATASETS_EXCLUDE", default=None)
 
+# Let PostgreSQL encode the geometries of GeoJSON exports (ST_AsGeoJSON).
+# This is much faster for large datasets, but limits the coordinates to 9 decimals.
+DSO_GEOJSON_DATABASE_ENCODING = env.bool("DSO_GEOJSON_DATABASE_ENCODING", False)
+
+# Let PostgreSQL transform the geometries to the requested Accept-Crs (ST_Transform).
+DSO_DATABASE_CRS_TRANSFORM = env.bool("DSO_DATABASE_CRS_TRANSFORM", False)
+
+# The cache that holds the data version of each table (the basis of the ETag header).
+# This has to be shared by all processes, including the import jobs.
+DSO_DATA_VERSION_CACHE = env.str("DSO_DATA_VERSION_CACHE", "default")
+
+# Cache complete API responses (in seconds, 0 disables the cache).
+# Only responses up to the max size (in bytes) are stored.
+DSO_RESPONSE_CACHE = "default"
+DSO_RESPONSE_CACHE_TIMEOUT = env.int("DSO_RESPONSE_CACHE_TIMEOUT", 0)
+DSO_RESPONSE_CACHE_MAX_SIZE = env.int("DSO_RESPONSE_CACHE_MAX_SIZE", 1024 * 1024)
+
+# Cache the exact pagination counts (in seconds, 0 disables the cache).
+DSO_COUNT_CACHE_TIMEOUT = env.int("DSO_COUNT_CACHE_TIMEOUT", 60)
+
+# Let the exact pagination count run in a worker thread, while the page is streamed.
+# This only applies to formats that write the count at the end (HAL-JSON and GeoJSON).
+DSO_DEFERRED_COUNT = env.bool("DSO_DEFERRED_COUNT", False)
+
+# Small lookup tables (by database table name) whose embedded objects are cached between requests.
+DSO_EMBED_CACHE_TABLES = env.list("DSO_EMBED_CACHE_TABLES", default=[])
+
 HAAL_CENTRAAL_API_KEY = os.getenv("HAAL_CENTRAAL_API_KEY", "UNKNOWN")
 HAAL_CENTRAAL_KEYFILE = os.getenv("HC_KEYFILE")
 HAAL_CENTRAAL_CERTFILE = os.getenv("HC_CERTFILE")
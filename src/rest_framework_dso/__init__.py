@@ -22,7 +22,7 @@ Additionally:
 
 * We support ``?_pageSize=...`` to change the REST page size, with ``?page_size=..`` as fallback.
 * We support ``?_format=..`` to request other output formats\
-  (e.g. ``json``, ``geojson`` or ``csv``).
+  (e.g. ``json``, ``geojson``, ``ndjson``, ``csv``, ``arrow`` or ``parquet``).
 
 Mandatory settings to activate these classes by default:
 
@@ -37,6 +37,7 @@ Mandatory settings to activate these classes by default:
             "rest_framework_dso.renderers.HALJSONRenderer",
             "rest_framework_dso.renderers.CSVRenderer",
             "rest_framework_dso.renderers.GeoJSONRenderer",
+            "rest_framework_dso.renderers.NDJSONRenderer",
             "rest_framework_dso.renderers.BrowsableAPIRenderer",  # Optional
         ],
         DEFAULT_FILTER_BACKENDS=[
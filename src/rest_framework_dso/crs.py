@@ -4,7 +4,13 @@
    Currently this package just imports the :class:`CRS` and :attr:`WGS84` objects
    from *django-gisserver* pretending that they exist here.
    This needs to be copied when publishing :mod:`rest_framework_dso` as a separate library.
+
+The :func:`transform_queryset` function lets the database transform the geometries
+into the requested CRS, so these don't have to be transformed in Python.
 """
+from django.contrib.gis.db import models as gis_models
+from django.contrib.gis.db.models.functions import Transform
+from django.db.models.query import ModelIterable
 from gisserver.geometries import CRS, WGS84
 
 __all__ = [
@@ -16,6 +22,8 @@ __all__ = [
     "DEFAULT_CRS",
     "OTHER_CRS",
     "ALL_CRS",
+    "TRANSFORMED_SUFFIX",
+    "transform_queryset",
 ]
 
 # Common projections for Dutch GIS systems:
@@ -37,3 +45,48 @@ OTHER_CRS = [WGS84, WEB_MERCATOR, ETRS89]
 
 #: All coordinate reference systems exposed by this file.
 ALL_CRS = set([DEFAULT_CRS] + OTHER_CRS)
+
+#: The suffix of the annotations that hold the geometries in the requested CRS.
+TRANSFORMED_SUFFIX = "_transformed"
+
+
+class TransformedGeometryIterable(ModelIterable):
+    """Place the geometries that the database transformed in their model fields."""
+
+    def __iter__(self):
+        names = [
+            (annotation, annotation[: -len(TRANSFORMED_SUFFIX)])
+            for annotation in self.queryset.query.annotation_select
+            if annotation.endswith(TRANSFORMED_SUFFIX)
+        ]
+        for obj in super().__iter__():
+            for annotation, name in names:
+                setattr(obj, name, obj.__dict__.pop(annotation))
+            yield obj
+
+
+def transform_queryset(queryset, accept_crs: CRS):
+    """Let the database transform the geometry fields into the accepted CRS (``ST_Transform``).
+    The model instances receive the transformed geometries, so the Python transformation
+    by :meth:`CRS.apply_to` has nothing left to do.
+    """
+    if getattr(queryset, "_iterable_class", None) is not ModelIterable:
+        return queryset  # e.g. values() querysets.
+
+    deferred_names, is_defer = queryset.query.deferred_loading
+    annotations = {
+        f"{model_field.name}{TRANSFORMED_SUFFIX}": Transform(model_field.name, accept_crs.srid)
+        for model_field in queryset.model._meta.concrete_fields
+        if isinstance(model_field, gis_models.GeometryField)
+        and model_field.srid != accept_crs.srid
+        and (model_field.name in deferred_names) != is_defer  # field is loaded.
+    }
+    if not annotations:
+        return queryset
+
+    # The original geometry no longer needs to be retrieved.
+    queryset = queryset.annotate(**annotations).defer(
+        *(annotation[: -len(TRANSFORMED_SUFFIX)] for annotation in annotations)
+    )
+    queryset._iterable_class = TransformedGeometryIterable
+    return queryset
@@ -6,13 +6,20 @@ the main objects are inspected while they are consumed by the output stream.
 """
 from __future__ import annotations
 
+import copy
+import logging
+import time
 from collections import defaultdict
 from dataclasses import dataclass
 from functools import cached_property
 from itertools import islice
 from typing import Callable, Dict, Iterable, Iterator, List, Optional, Type, TypeVar, Union
 
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
 from django.db import models
+from django.db.models.lookups import In
+from django.utils.datastructures import OrderedSet
 from lru import LRU
 from rest_framework import serializers
 from rest_framework.exceptions import ParseError
@@ -24,6 +31,14 @@ DictOfDicts = Dict[str, Dict[str, dict]]
 T = TypeVar("T")
 M = TypeVar("M", bound=models.Model)
 DEFAULT_SQL_CHUNK_SIZE = 2000  # allow unit tests to alter this.
+DEFAULT_ID_BATCH_SIZE = 1000
+DEFAULT_SHARED_CACHE_SIZE = 10_000
+
+logger = logging.getLogger(__name__)
+
+# Objects of small tables that rarely change, shared between requests.
+# The keys are (db_table, related id), see is_shared_cache_model().
+_shared_objects = LRU(DEFAULT_SHARED_CACHE_SIZE)
 
 
 def parse_expand_scope(
@@ -333,8 +348,17 @@ class ChunkedQuerySetIterator(Iterable[M]):
                 return
 
         # Reuse the Django machinery for retrieving missing sub objects.
-        # and analyse the ForeignKey caches to allow faster prefetches next time
+        # and analyse the ForeignKey caches to allow faster prefetches next time.
+        start = time.perf_counter()
         models.prefetch_related_objects(instances, *self.queryset._prefetch_related_lookups)
+
+        logger.debug(
+            "Prefetched %s for %d %s objects in %.3fs",
+            ", ".join(map(str, self.queryset._prefetch_related_lookups)),
+            len(instances),
+            self.queryset.model._meta.label,
+            time.perf_counter() - start,
+        )
         self._persist_prefetch_cache(instances)
 
     def _persist_prefetch_cache(self, instances):
@@ -371,6 +395,120 @@ class ChunkedQuerySetIterator(Iterable[M]):
         return all_restored
 
 
+@models.Field.register_lookup
+class ArrayAny(In):
+    """The ``field__any=[...]`` lookup, written as ``field = ANY(%s)`` with an array parameter.
+
+    This is used for the queries of the :class:`EmbeddedResultSet`. Unlike ``__in``,
+    the values are passed as a single parameter instead of a ``%s`` placeholder for each value.
+    Other databases receive the regular ``IN (...)`` list.
+    """
+
+    lookup_name = "any"
+
+    def as_sql(self, compiler, connection):
+        if connection.vendor != "postgresql" or not self.rhs_is_direct_value():
+            return super().as_sql(compiler, connection)
+
+        try:
+            rhs = OrderedSet(value for value in self.rhs if value is not None)
+        except TypeError:  # Unhashable items in self.rhs
+            return super().as_sql(compiler, connection)
+        if not rhs:
+            raise EmptyResultSet
+
+        sqls, params = self.batch_process_rhs(compiler, connection, rhs)
+        if any(sql != "%s" for sql in sqls):
+            # Values that need a database function (e.g. geometries) stay in the IN list.
+            return super().as_sql(compiler, connection)
+
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        return f"{lhs} = ANY(%s)", [*lhs_params, list(params)]
+
+
+def is_shared_cache_model(model: Type[models.Model]) -> bool:
+    """Tell whether the objects of the model are cached between requests.
+    This is meant for small lookup tables that rarely change (e.g. status codes).
+    """
+    return model._meta.db_table in getattr(settings, "DSO_EMBED_CACHE_TABLES", ())
+
+
+def clear_shared_cache():
+    """Remove all objects from the process-wide cache (e.g. when the models are reloaded)."""
+    _shared_objects.clear()
+
+
+def _copy_shared_object(obj: M) -> M:
+    """Copy a model instance without its relation caches.
+    A plain ``copy.copy()`` would share the ``_state`` and prefetch caches with the original,
+    so nested embeds of one request would be stored in (or read from) the shared object.
+    """
+    obj_copy = copy.copy(obj)
+    obj_copy._state = copy.copy(obj._state)
+    obj_copy._state.fields_cache = {}
+    obj_copy.__dict__.pop("_prefetched_objects_cache", None)
+    return obj_copy
+
+
+def get_nested_expanded_fields(serializer: serializers.Serializer) -> List[EmbeddedFieldMatch]:
+    """Tell which embeds the serializer of an embedded object will expand."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    return getattr(serializer, "expanded_fields", None) or []
+
+
+def prefetch_nested_embeds(instances: List[M], expanded_fields: List[EmbeddedFieldMatch]):
+    """Resolve the nested embedded objects of the instances, dataloader-style.
+
+    Instead of letting the serializer query the embedded objects of each instance,
+    the IDs of all instances are collected and fetched in one query per relation.
+    After that, the next nesting level is handled for all retrieved objects.
+    The objects are stored in the Django relation caches of the instances,
+    where ``DSOModelSerializer._get_expand()`` finds them.
+    """
+    level = [(instances, expanded_fields)]
+    while level:
+        next_level = []
+        for parents, embed_matches in level:
+            for embed_match in embed_matches:
+                children = _prefetch_embedded_objects(parents, embed_match)
+                if children and (
+                    nested_fields := get_nested_expanded_fields(embed_match.embedded_serializer)
+                ):
+                    next_level.append((children, nested_fields))
+        level = next_level
+
+
+def _prefetch_embedded_objects(parents: List[M], embed_match: EmbeddedFieldMatch) -> list:
+    """Fetch the embedded objects for all parents, return the retrieved objects.
+    Relations that are not a regular foreign key or many-to-many field are left as-is,
+    these are still resolved per object by the serializer.
+    """
+    field = embed_match.field
+    source_field = field.source_field
+    if isinstance(source_field, models.ManyToManyField):
+        is_temporal = getattr(field.related_model, "is_temporal", None)
+        if is_temporal is not None and is_temporal():
+            return []  # needs the special ID logic of the EmbeddedManyToManyField
+
+        models.prefetch_related_objects(parents, source_field.name)
+        objects = (obj for parent in parents for obj in getattr(parent, source_field.name).all())
+        return list({obj.pk: obj for obj in objects}.values())
+    elif isinstance(source_field, models.ForeignKey) and source_field.target_field.primary_key:
+        # The objects are retrieved by primary key, so the same batching can be reused.
+        result_set = EmbeddedResultSet(
+            field, serializer=embed_match.embedded_serializer, main_instances=parents
+        )
+        objects = {obj.pk: obj for batch in result_set.iter_batches() for obj in batch}
+
+        cache_name = source_field.get_cache_name()
+        for parent in parents:
+            parent._state.fields_cache[cache_name] = objects.get(getattr(parent, field.attname))
+        return list(objects.values())
+    else:
+        return []
+
+
 class ObservableIterator(Iterator[T]):
     """Observe the objects that are being returned.
 
@@ -426,8 +564,14 @@ class EmbeddedResultSet(ReturnGenerator):
     The :func:`inspect_instance` is called each time an object is retrieved.
     As alternative, all instances *can* be provided at construction, which is
     typically useful for a detail page as this breaks streaming otherwise.
+
+    The collected IDs are deduplicated, and retrieved in batches of :attr:`id_batch_size`.
+    Each batch is streamed before the next one is fetched.
     """
 
+    #: The maximum number of IDs to retrieve in a single query (or remote call).
+    id_batch_size = DEFAULT_ID_BATCH_SIZE
+
     def __init__(
         self,
         embedded_field: AbstractEmbeddedField,
@@ -442,7 +586,7 @@ class EmbeddedResultSet(ReturnGenerator):
 
         super().__init__(generator=None, serializer=serializer)
         self.embedded_field = embedded_field
-        self.id_list = []
+        self.id_list = {}  # using a dict as ordered set.
         self.id_fetcher = id_fetcher
 
         if id_fetcher is None and serializer.parent.id_based_fetcher:
@@ -458,20 +602,80 @@ class EmbeddedResultSet(ReturnGenerator):
         """Inspect a main object to find any references for this embedded result."""
         ids = self.embedded_field.get_related_ids(instance)
         if ids:
-            self.id_list.extend(ids)
+            # Objects often refer to the same related object, only fetch these once.
+            self.id_list.update(dict.fromkeys(ids))
 
     def get_objects(self) -> Iterator[models.Model]:
-        """Retrieve the objects to render"""
+        """Retrieve the objects to render, one batch of IDs at a time.
+        Any nested embeds are resolved for the whole batch, instead of per object.
+        """
+        nested_fields = get_nested_expanded_fields(self.serializer)
+        for objects in self.iter_batches():
+            if nested_fields:
+                objects = list(objects)
+                prefetch_nested_embeds(objects, nested_fields)
+            yield from objects
+
+    def iter_batches(self) -> Iterator[Iterable[models.Model]]:
+        """Retrieve the objects for each batch of IDs."""
+        for id_batch in self.iter_id_batches():
+            yield self.get_batch_objects(id_batch)
+
+    def iter_id_batches(self) -> Iterator[list]:
+        """Split the collected IDs into batches."""
+        id_iter = iter(self.id_list)
+        while id_batch := list(islice(id_iter, self.id_batch_size)):
+            yield id_batch
+
+    def get_batch_objects(self, id_list: list) -> Iterable[models.Model]:
+        """Retrieve the objects for a single batch of IDs."""
+        if (
+            is_shared_cache_model(self.embedded_field.related_model)
+            and not self.embedded_field.is_loose
+        ):
+            return self.get_shared_objects(id_list)
+        else:
+            return self.query_objects(id_list)
+
+    def get_shared_objects(self, id_list: list) -> Iterator[models.Model]:
+        """Retrieve the objects from the process-wide cache, only query the missing ones.
+        Copies are returned, so the relation caches of the shared objects are not altered.
+        """
+        db_table = self.embedded_field.related_model._meta.db_table
+        id_attname = self.embedded_field.related_id_attname
+        missing_ids = []
+        for id_value in id_list:
+            if (obj := _shared_objects.get((db_table, id_value))) is not None:
+                yield _copy_shared_object(obj)
+            else:
+                missing_ids.append(id_value)
+
+        if missing_ids:
+            for obj in self.query_objects(missing_ids):
+                # Stored by the same value that get_related_ids() returns.
+                id_value = getattr(obj, id_attname)
+                _shared_objects[(db_table, id_value)] = _copy_shared_object(obj)
+                yield obj
+
+    def query_objects(self, id_list: list) -> Iterable[models.Model]:
+        """Query the objects for the IDs."""
+        queryset = self.get_queryset(id_list)
+        if not isinstance(queryset, models.QuerySet):
+            return queryset  # may return an iterator, can't optimize
+
+        return self.optimize_queryset(queryset)
+
+    def get_queryset(self, id_list: list) -> Union[models.QuerySet, Iterable[models.Model]]:
+        """Tell how the objects for the IDs are retrieved."""
         if self.id_fetcher is None:
             # Standard Django foreign-key like behavior.
-            queryset = self.embedded_field.related_model.objects.filter(pk__in=self.id_list)
+            id_attname = self.embedded_field.related_id_attname
+            return self.embedded_field.related_model.objects.filter(
+                **{f"{id_attname}__any": id_list}
+            )
         else:
             # e.g. retrieve from a remote API, or filtered database table.
-            queryset = self.id_fetcher(self.id_list)
-            if not isinstance(queryset, models.QuerySet):
-                return queryset  # may return an iterator, can't optimize
-
-        return self.optimize_queryset(queryset)
+            return self.id_fetcher(id_list)
 
     def optimize_queryset(self, queryset):
         """Optimize the queryset, see if N-query calls can be avoided."""
@@ -1,13 +1,22 @@
-from typing import Optional, Type
+import re
+from typing import Optional, Tuple, Type
 
 from django.db import models
 from django.db.models.fields.related import RelatedField
 from django.db.models.fields.reverse_related import ForeignObjectRel
+from django.urls import NoReverseMatch
 from django.utils.functional import cached_property
 from more_itertools import first
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from rest_framework_gis.fields import GeometryField
 
+#: The value that is reversed in place of the object identifier, to find its position in the URL.
+URL_TEMPLATE_PLACEHOLDER = "__dso_lookup_value__"
+
+#: Identifiers that reverse() would insert unchanged in the URL (no quoting needed).
+URL_TEMPLATE_SAFE_VALUE = re.compile(r"[A-Za-z0-9_\-]+")
+
 
 def parse_request_fields(fields: Optional[str]):
     if not fields:
@@ -17,6 +26,63 @@ def parse_request_fields(fields: Optional[str]):
     return fields.split(",")
 
 
+def template_reverse(viewname, args=None, kwargs=None, request=None, format=None, **extra):
+    """A faster drop-in replacement for the REST Framework ``reverse()`` function.
+
+    Each view name is only resolved once per request, into a URL template.
+    The URLs of all objects are generated by inserting the lookup value into that template.
+    Values that need quoting are still resolved by ``reverse()``.
+    """
+    if args or extra or request is None or (kwargs and len(kwargs) > 1):
+        return reverse(viewname, args, kwargs, request, format, **extra)
+
+    lookup, value = next(iter(kwargs.items())) if kwargs else (None, "")
+    value = str(value)
+    template = get_url_template(request, viewname, lookup, format)
+    if template is None or (lookup is not None and not URL_TEMPLATE_SAFE_VALUE.fullmatch(value)):
+        return reverse(viewname, args, kwargs, request, format, **extra)
+
+    return f"{template[0]}{value}{template[1]}"
+
+
+def get_url_template(request, viewname, lookup=None, format=None) -> Optional[Tuple[str, str]]:
+    """Resolve the URL of a view once for the request, as the parts around the lookup value.
+    This returns ``None`` when the view can't be resolved that way.
+    """
+    try:
+        templates = request._dso_url_templates
+    except AttributeError:
+        templates = request._dso_url_templates = {}
+
+    key = (viewname, lookup, format)
+    try:
+        return templates[key]
+    except KeyError:
+        pass
+
+    kwargs = {lookup: URL_TEMPLATE_PLACEHOLDER} if lookup is not None else None
+    try:
+        url = reverse(viewname, kwargs=kwargs, request=request, format=format)
+    except NoReverseMatch:
+        # e.g. the URL pattern only accepts integers, leave it to reverse() for every object.
+        template = None
+    else:
+        parts = url.split(URL_TEMPLATE_PLACEHOLDER) if lookup is not None else [url, ""]
+        template = (parts[0], parts[1]) if len(parts) == 2 else None
+
+    templates[key] = template
+    return template
+
+
+class URLTemplateMixin:
+    """Let a hyperlinked field generate its URLs using :func:`template_reverse`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The HyperlinkedRelatedField assigns the reverse() function in its __init__.
+        self.reverse = template_reverse
+
+
 class AbstractEmbeddedField:
     """A 'virtual' field that contains the configuration of an embedded field.
 
@@ -116,6 +182,11 @@ class AbstractEmbeddedField:
             else:
                 return self.source
 
+    @cached_property
+    def related_id_attname(self) -> str:
+        """Tell which field of the related object holds the values of :meth:`get_related_ids`."""
+        return "pk"
+
 
 class EmbeddedField(AbstractEmbeddedField):
     """An embedded field for a foreign-key relation."""
@@ -125,6 +196,14 @@ class EmbeddedField(AbstractEmbeddedField):
         id_value = getattr(instance, self.attname, None)
         return [] if id_value is None else [id_value]
 
+    @cached_property
+    def related_id_attname(self) -> str:
+        """The foreign key can refer to another field than the primary key (``to_field``)."""
+        try:
+            return self.source_field.target_field.attname
+        except (models.FieldDoesNotExist, AttributeError):
+            return "pk"  # e.g. a loose relation
+
 
 class EmbeddedManyToManyField(AbstractEmbeddedField):
     """An embedded field for a n-m relation."""
@@ -170,7 +249,7 @@ class EmbeddedManyToManyField(AbstractEmbeddedField):
         return ids
 
 
-class LinksField(serializers.HyperlinkedIdentityField):
+class LinksField(URLTemplateMixin, serializers.HyperlinkedIdentityField):
     """Internal field to generate the _links bit"""
 
     def to_representation(self, value):
@@ -213,12 +292,15 @@ class DSOGeometryField(GeometryField):
         elif self._output_format == "csv":
             # Extended well-known text for CSV format.
             return value.ewkt
+        elif self._output_format in ("arrow", "parquet"):
+            # Extended well-known binary for the columnar formats.
+            return bytes(value.ewkb)
         else:
             # Return GeoJSON for json/html/api formats
             return super().to_representation(value)
 
 
-class HALHyperlinkedRelatedField(serializers.HyperlinkedRelatedField):
+class HALHyperlinkedRelatedField(URLTemplateMixin, serializers.HyperlinkedRelatedField):
     """Wrap the url from the HyperlinkedRelatedField according to HAL specs"""
 
     def to_representation(self, value):
@@ -242,3 +324,27 @@ class GeoJSONIdentifierField(serializers.Field):
 
     def to_representation(self, value):
         return f"{self.model._meta.object_name}.{value.pk}"
+
+    def get_values_converter(self):
+        """Render the identifier from the primary key of a ``values_list()`` row."""
+        prefix = f"{self.model._meta.object_name}."
+        return "pk", lambda pk: f"{prefix}{pk}"
+
+
+class GeoJSONFragment(bytes):
+    """A geometry that is already encoded as GeoJSON (e.g. by the database).
+    The renderer writes these bytes directly into the output.
+    """
+
+
+class GeoJSONAnnotationField(serializers.Field):
+    """A field that reads a geometry that the database already encoded as GeoJSON.
+    This reads a queryset annotation, e.g. ``AsGeoJSON(Transform(...))``.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value: str):
+        return GeoJSONFragment(value.encode())
@@ -37,7 +37,7 @@ class DSOFilterBackend(DjangoFilterBackend):
         """
         return ""
 
-    _NON_FIELDS = {"_fields", "_format", "_sort", "_pageSize", "_page_size"}
+    _NON_FIELDS = {"_fields", "_format", "_sort", "_pageSize", "_page_size", "_cursor", "_count"}
 
     def is_unfiltered(self, request):
         # If there are request parameters (except for this hard-coded exclude list),
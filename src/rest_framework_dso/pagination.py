@@ -5,12 +5,56 @@ https://tools.ietf.org/html/draft-kelly-json-hal-08
 """
 from __future__ import annotations
 
+import base64
+import binascii
+import hashlib
+import json
+from functools import partial
+from typing import Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.db.models.sql import Query
 from rest_framework import pagination
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ParseError, ValidationError
 from rest_framework.response import Response
 from rest_framework.serializers import ListSerializer
 from rest_framework.utils.serializer_helpers import ReturnList
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from rest_framework_dso.paginator import (
+    COUNT_DEFERRED,
+    COUNT_ESTIMATE,
+    COUNT_EXACT,
+    COUNT_NONE,
+    DeferredValue,
+    DSOPaginator,
+)
+
+#: The JSON types that a cursor may contain (besides ``null``).
+CURSOR_VALUE_TYPES = (str, int, float, bool)
+
+
+class CursorPage:
+    """A page of the keyset (cursor) pagination.
+    This offers the same attributes as Django's ``Page`` object that are used here.
+    """
+
+    number = None
+
+    def __init__(self, object_list, per_page: int, next_cursor: Optional[str]):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return False  # Only forward navigation is supported.
 
 
 class DSOHTTPHeaderPageNumberPagination(pagination.PageNumberPagination):
@@ -20,10 +64,24 @@ class DSOHTTPHeaderPageNumberPagination(pagination.PageNumberPagination):
     * ``X-Pagination-Limit``: page size
     * ``X-Pagination-Count``: number of pages (optional)
     * ``X-Total-Count``: total number of results (optional)
+    * ``X-Total-Count-Estimated``: ``true`` when the total is an estimate (optional)
 
     This can be used for for non-JSON exports (e.g. CSV files).
+
+    The total count is estimated for large results, unless ``?_count=true`` is given.
+    Estimated counts are marked with ``page.countEstimated`` and ``X-Total-Count-Estimated``.
+    With ``?_count=false`` the count is omitted altogether.
+
+    Exact counts are cached for ``settings.DSO_COUNT_CACHE_TIMEOUT`` seconds,
+    when the view provides a ``get_data_version()`` function to invalidate the cache.
+
+    With ``settings.DSO_DEFERRED_COUNT``, the exact count runs in a worker thread
+    while the page is streamed. This only happens for output formats that write the count
+    at the end of the response, the HTTP headers won't include the count in that case.
     """
 
+    django_paginator_class = DSOPaginator
+
     # Using underscore as "escape" for DSO compliance.
 
     #: The page number query parameter.
@@ -32,14 +90,31 @@ class DSOHTTPHeaderPageNumberPagination(pagination.PageNumberPagination):
     #: The page size query parameter.
     page_size_query_param = "_pageSize"
 
+    #: The cursor query parameter, which selects keyset pagination (e.g. ``?_cursor=``).
+    cursor_query_param = "_cursor"
+
+    #: The query parameter to request an exact count (``?_count=true``) or no count at all.
+    count_query_param = "_count"
+
+    #: How the total count is determined by default.
+    count_mode = COUNT_ESTIMATE
+
     def paginate_queryset(self, queryset, request, view=None):
         """Optimized base class logic, to return a queryset instead of list."""
         page_size = self.get_page_size(request)
         if not page_size:
             return None
 
-        paginator = self.django_paginator_class(queryset, page_size)
+        self.request = request
+        if self.cursor_query_param in request.query_params:
+            self.page = self._paginate_cursor(
+                queryset, page_size, request.query_params[self.cursor_query_param]
+            )
+            return self.page.object_list
+
         page_number = request.query_params.get(self.page_query_param, 1)
+        count_mode = self.get_count_mode(request, page_number)
+        paginator = self.get_paginator(queryset, page_size, count_mode, view=view)
         if page_number in self.last_page_strings:
             page_number = paginator.num_pages
 
@@ -49,13 +124,52 @@ class DSOHTTPHeaderPageNumberPagination(pagination.PageNumberPagination):
             msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
             raise NotFound(msg) from exc
 
-        if paginator.num_pages > 1 and self.template is not None:
+        if self.template is not None and (paginator.num_pages or 0) > 1:
             # The browsable API should display pagination controls.
             self.display_page_controls = True
 
-        self.request = request
         return self.page.object_list  # original: list(self.page)
 
+    def get_paginator(self, queryset, page_size, count_mode, view=None):
+        """Create the Django paginator, which reuses a previously cached count."""
+        cache_key = None
+        if count_mode in (COUNT_EXACT, COUNT_DEFERRED):
+            cache_key = self.get_count_cache_key(queryset, view)
+            if cache_key is not None and (count := cache.get(cache_key)) is not None:
+                paginator = self.django_paginator_class(
+                    queryset, page_size, count_mode=COUNT_EXACT
+                )
+                paginator.count = count  # overwrites the cached_property
+                return paginator
+
+        paginator = self.django_paginator_class(queryset, page_size, count_mode=count_mode)
+        if cache_key is not None:
+            if paginator.deferred_count is not None:
+                paginator.deferred_count.future.add_done_callback(partial(_cache_count, cache_key))
+            else:
+                cache.set(cache_key, paginator.count, settings.DSO_COUNT_CACHE_TIMEOUT)
+        return paginator
+
+    def get_count_cache_key(self, queryset, view) -> Optional[str]:
+        """Tell what the cache key for the count of the queryset is.
+        The key is based on the SQL query (so the filters are normalized),
+        the scopes of the user and the data version of all tables in the query.
+        """
+        get_data_version = getattr(view, "get_data_version", None)
+        if not getattr(settings, "DSO_COUNT_CACHE_TIMEOUT", 0) or get_data_version is None:
+            return None
+
+        query = queryset.order_by().query
+        sql, params = query.get_compiler(queryset.db).as_sql()
+        db_tables = sorted(get_query_tables(query))
+        data_version = get_data_version(db_tables)
+        if data_version is None:
+            return None
+
+        scopes = sorted(getattr(self.request, "get_token_scopes", None) or ())
+        key = "\n".join([sql, repr(params), ",".join(scopes), data_version])
+        return f"dso_api:pagination_count:{hashlib.md5(key.encode()).hexdigest()}"
+
     def get_page_size(self, request):
         """Allow the ``page_size`` parameter was fallback."""
         if self.page_size_query_param not in request.query_params:
@@ -67,18 +181,132 @@ class DSOHTTPHeaderPageNumberPagination(pagination.PageNumberPagination):
 
         return super().get_page_size(request)
 
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "Request an exact total count (true), or no count at all (false)."
+                    " By default, the count of large results is estimated."
+                ),
+                "schema": {"type": "boolean"},
+            },
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Use keyset pagination, starting with an empty value.",
+                "schema": {"type": "string"},
+            },
+        ]
+
+    def get_count_mode(self, request, page_number=None) -> str:
+        """Tell how the total number of results should be determined."""
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            count_mode = self.count_mode
+        elif value == "true":
+            count_mode = COUNT_EXACT
+        elif value == "false":
+            count_mode = COUNT_NONE
+        else:
+            raise ParseError(f"Only {self.count_query_param}=true|false is allowed.")
+
+        if page_number in self.last_page_strings:
+            # The last page can only be found with an exact count.
+            return COUNT_EXACT
+        elif count_mode == COUNT_EXACT and self.can_defer_count(request):
+            return COUNT_DEFERRED
+        else:
+            return count_mode
+
+    def can_defer_count(self, request) -> bool:
+        """Tell whether the count can run in a worker thread.
+        This is only possible when the renderer writes the count at the end of the response.
+        """
+        renderer = getattr(request, "accepted_renderer", None)
+        return getattr(settings, "DSO_DEFERRED_COUNT", False) and getattr(
+            renderer, "supports_deferred_count", False
+        )
+
+    def get_deferred_count(self) -> Optional[DeferredValue]:
+        """Return the count that is still calculated by a worker thread, if any."""
+        paginator = getattr(self.page, "paginator", None)
+        return getattr(paginator, "deferred_count", None)
+
+    def _paginate_cursor(self, queryset, page_size, cursor) -> CursorPage:
+        """Keyset pagination: filter on the last seen ordering values instead of OFFSET.
+        This avoids scanning all previous records when reading deep pages.
+        """
+        ordering = _get_keyset_ordering(queryset)
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            values = self._decode_cursor(cursor, len(ordering))
+            try:
+                queryset = queryset.filter(_get_keyset_filter(ordering, values))
+            except (DjangoValidationError, TypeError, ValueError) as e:
+                # e.g. a text value for a date field.
+                raise ValidationError("Invalid cursor value.", code=self.cursor_query_param) from e
+
+        # Read the key of the last object in this page, and see whether a next page exists.
+        names = [name.lstrip("-") for name in ordering]
+        keys = list(queryset.values_list(*names)[page_size - 1 : page_size + 1])
+        next_cursor = _encode_cursor(keys[0]) if len(keys) > 1 else None
+        return CursorPage(queryset[:page_size], page_size, next_cursor)
+
+    def _decode_cursor(self, cursor: str, length: int) -> list:
+        """Read the ordering values from the cursor.
+        As this is client input, it's checked to be a list of scalar values.
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError) as e:
+            raise ValidationError("Invalid cursor value.", code=self.cursor_query_param) from e
+
+        if (
+            not isinstance(values, list)
+            or len(values) != length
+            or not all(value is None or isinstance(value, CURSOR_VALUE_TYPES) for value in values)
+        ):
+            raise ValidationError("Invalid cursor value.", code=self.cursor_query_param)
+        return values
+
+    def get_next_link(self) -> Optional[str]:
+        if not isinstance(self.page, CursorPage):
+            return super().get_next_link()
+        elif not self.page.has_next():
+            return None
+
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.page.next_cursor)
+
+    def get_previous_link(self) -> Optional[str]:
+        if isinstance(self.page, CursorPage):
+            return None
+        return super().get_previous_link()
+
     def get_paginated_response(self, data) -> Response:
         """Adds the DSO HTTP headers only.
         It wraps the data in the :class:`~rest_framework.response.Response` object.
         """
         response = Response(data)  # no content added!
+        if isinstance(self.page, CursorPage):
+            # Page numbers and counts are unknown with keyset pagination.
+            response["X-Pagination-Limit"] = self.page.per_page
+            return response
+
         response["X-Pagination-Page"] = self.page.number
 
         paginator = self.page.paginator
         response["X-Pagination-Limit"] = paginator.per_page
-        # Optional but available on this paginator:
-        response["X-Pagination-Count"] = paginator.num_pages
-        response["X-Total-Count"] = paginator.count
+        # Optional, these are omitted with ?_count=false:
+        if paginator.count is not None:
+            response["X-Pagination-Count"] = paginator.num_pages
+            response["X-Total-Count"] = paginator.count
+            if not paginator.count_is_exact:
+                response["X-Total-Count-Estimated"] = "true"
         return response
 
 
@@ -156,14 +384,7 @@ class DSOPageNumberPagination(DSOHTTPHeaderPageNumberPagination):
         if (prev_link := self.get_previous_link()) is not None:
             _links["previous"] = {"href": prev_link}
 
-        paginator = self.page.paginator
-        page = {
-            "number": self.page.number,
-            "size": paginator.per_page,
-            "totalElements": paginator.count,
-            "totalPages": paginator.num_pages,
-        }
-
+        page = self._get_page_data()
         if isinstance(data, dict):
             # Used DSOListSerializer, already received multiple lists
             return {
@@ -186,6 +407,113 @@ class DSOPageNumberPagination(DSOHTTPHeaderPageNumberPagination):
                 "page": page,
             }
 
+    def _get_page_data(self) -> dict:
+        if isinstance(self.page, CursorPage):
+            return {"size": self.page.per_page}
+
+        paginator = self.page.paginator
+        page = {"number": self.page.number, "size": paginator.per_page}
+        if paginator.count is not None:
+            page["totalElements"] = paginator.count
+            page["totalPages"] = paginator.num_pages
+            if not paginator.count_is_exact:
+                page["countEstimated"] = True
+        elif paginator.deferred_count is not None:
+            # The renderer writes these once the worker thread completed the count.
+            page["totalElements"] = paginator.deferred_count
+            page["totalPages"] = paginator.deferred_count.map(paginator.get_num_pages)
+        return page
+
     def get_results(self, data):
         """Implement DRF hook for completeness, can be used by the browsable API."""
         return data["_embedded"][self.results_field]
+
+
+def _cache_count(cache_key, future):
+    """Store the count in the cache, once the worker thread has finished."""
+    if not future.cancelled() and future.exception() is None:
+        cache.set(cache_key, future.result(), settings.DSO_COUNT_CACHE_TIMEOUT)
+
+
+def get_query_tables(query: Query) -> Set[str]:
+    """Find all database tables that the query reads, including those of subqueries
+    (e.g. the filters that use ``__in=queryset``, ``Exists()`` or ``Subquery()``).
+    """
+    tables = set()
+    pending = [query]
+    while pending:
+        query = pending.pop()
+        tables.add(query.get_meta().db_table)  # alias_map is only complete after compiling.
+        tables.update(alias.table_name for alias in query.alias_map.values())
+        pending.extend(_get_subqueries(query))
+    return tables
+
+
+def _get_subqueries(query: Query) -> Iterator[Query]:
+    """Find the subqueries in the filters and annotations of the query."""
+    pending = [query.where, *query.annotations.values()]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, Query):
+            yield node
+        elif isinstance(subquery := getattr(node, "query", None), Query):
+            yield subquery  # e.g. Exists() or Subquery()
+        elif hasattr(node, "children"):
+            pending.extend(node.children)  # WhereNode
+        elif hasattr(node, "get_source_expressions"):
+            pending.extend(node.get_source_expressions())  # e.g. lookups and functions
+
+
+def _get_keyset_ordering(queryset) -> List[str]:
+    """Tell what the ordering of the queryset is, made unique by adding the primary key.
+    This includes the ``?_sort=..`` ordering that the ``DSOOrderingFilter`` applied.
+    """
+    query = queryset.query
+    ordering = list(
+        query.order_by or (query.get_meta().ordering if query.default_ordering else [])
+    )
+    if not all(isinstance(name, str) for name in ordering):
+        raise ValidationError(
+            "Cursor pagination is not supported for this ordering.", code="_cursor"
+        )
+
+    pk_name = query.get_meta().pk.name
+    if not {"pk", "-pk", pk_name, f"-{pk_name}"}.intersection(ordering):
+        ordering.append("pk")
+    return ordering
+
+
+def _get_keyset_filter(ordering: List[str], values: list) -> Q:
+    """Generate the filter that only returns the objects after the given ordering values.
+    For ``ORDER BY a, b`` this becomes ``a > x OR (a = x AND b > y)``.
+
+    The NULL values are taken into account, which PostgreSQL sorts as the highest values.
+    """
+    result = Q(pk__in=[])  # nothing
+    equal = Q()
+    for name, value in zip(ordering, values):
+        after, same = _get_keyset_lookups(name, value)
+        result |= equal & after
+        equal &= same
+
+    return result
+
+
+def _get_keyset_lookups(name: str, value) -> Tuple[Q, Q]:
+    """Generate the "after" and "equals" lookups for a single ordering field."""
+    field = name.lstrip("-")
+    if value is None:
+        # NULL sorts last for ascending, first for descending ordering.
+        after = Q(**{f"{field}__isnull": False}) if name.startswith("-") else Q(pk__in=[])
+        return after, Q(**{f"{field}__isnull": True})
+    elif name.startswith("-"):
+        return Q(**{f"{field}__lt": value}), Q(**{field: value})
+    else:
+        return Q(**{f"{field}__gt": value}) | Q(**{f"{field}__isnull": True}), Q(**{field: value})
+
+
+def _encode_cursor(values: tuple) -> str:
+    """Encode the ordering values of the last seen object as opaque string.
+    Values such as dates and decimals are written as string, which the ORM parses again.
+    """
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
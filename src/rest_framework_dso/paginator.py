@@ -0,0 +1,195 @@
+"""The Django paginator classes that avoid running an expensive ``COUNT(*)`` query.
+
+On large tables, counting all (filtered) records takes longer than fetching the page itself.
+Instead, the estimates of the PostgreSQL query planner can be used:
+
+* For unfiltered queries, the ``reltuples`` statistic of the table is read.
+* For filtered queries, the row estimate of ``EXPLAIN`` is used.
+
+Small results are still counted, as the estimates are unreliable for those.
+
+The exact count can also be deferred: it then runs in a worker thread with its own
+database connection, while the page is already streamed to the client.
+"""
+from __future__ import annotations
+
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from math import ceil
+from typing import Callable, Optional
+
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+#: Count all records (the classic behavior).
+COUNT_EXACT = "exact"
+
+#: Use the planner estimates for large results.
+COUNT_ESTIMATE = "estimate"
+
+#: Don't count the records at all.
+COUNT_NONE = "none"
+
+#: Count all records in a worker thread, the count is available once the page is written.
+COUNT_DEFERRED = "deferred"
+
+# Threads are only started once the first count is submitted.
+_count_executor = ThreadPoolExecutor(thread_name_prefix="dso-count")
+
+
+class DeferredValue:
+    """A value that is calculated by a worker thread (e.g. the total count).
+    Renderers that write the pagination at the end of the response resolve it there.
+    """
+
+    def __init__(self, future: Future, transform: Optional[Callable] = None):
+        self.future = future
+        self.transform = transform
+
+    def resolve(self):
+        """Wait for the value to be available."""
+        value = self.future.result()
+        return self.transform(value) if self.transform is not None else value
+
+    def map(self, transform: Callable) -> DeferredValue:
+        """Derive another value from the result (e.g. the number of pages)."""
+        return DeferredValue(self.future, transform)
+
+
+class DSOPage(Page):
+    """A page that can tell whether there is a next page without knowing the total count."""
+
+    def has_next(self) -> bool:
+        if self.paginator.count_is_exact:
+            return super().has_next()
+        return self._has_next_object
+
+    @cached_property
+    def _has_next_object(self) -> bool:
+        # Check whether a single record exists after this page.
+        top = self.number * self.paginator.per_page
+        return len(self.paginator.object_list[top : top + 1]) > 0
+
+
+class DSOPaginator(Paginator):
+    """A paginator that either counts, estimates or skips the total number of records.
+
+    When the count is not exact, the page numbers are no longer validated against
+    the total number of pages, as that number is not reliable.
+    """
+
+    #: Below this estimate, the records are still counted.
+    estimate_threshold = 10_000
+
+    def __init__(self, object_list, per_page, count_mode=COUNT_EXACT, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_mode = count_mode
+        self.count_is_exact = count_mode == COUNT_EXACT
+        self.deferred_count: Optional[DeferredValue] = None
+        if count_mode == COUNT_DEFERRED:
+            self.deferred_count = defer_count(object_list)
+
+    @cached_property
+    def count(self) -> Optional[int]:
+        """The total number of objects, which can be an estimate, or ``None``."""
+        if self.count_mode in (COUNT_NONE, COUNT_DEFERRED):
+            return None
+        elif self.count_mode == COUNT_ESTIMATE:
+            estimate = get_estimated_count(self.object_list)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+
+        self.count_is_exact = True
+        return super().count
+
+    @cached_property
+    def num_pages(self) -> Optional[int]:
+        if self.count is None:
+            return None
+        return self.get_num_pages(self.count)
+
+    def get_num_pages(self, count: int) -> int:
+        """Calculate the number of pages for the given count."""
+        if count == 0 and not self.allow_empty_first_page:
+            return 0
+        hits = max(1, count - self.orphans)
+        return ceil(hits / self.per_page)
+
+    def validate_number(self, number) -> int:
+        if self.count is not None and self.count_is_exact:
+            return super().validate_number(number)
+
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer") from None
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def page(self, number) -> DSOPage:
+        number = self.validate_number(number)
+        if self.count_is_exact:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom : bottom + self.per_page], number, self)
+
+    def _get_page(self, *args, **kwargs):
+        return DSOPage(*args, **kwargs)
+
+
+def defer_count(queryset) -> DeferredValue:
+    """Start counting the queryset in a worker thread."""
+    # Make a copy in this thread, so the worker doesn't share the queryset object.
+    return DeferredValue(_count_executor.submit(_count_queryset, queryset.order_by()))
+
+
+def _count_queryset(queryset) -> int:
+    """Count the queryset. As this runs in a separate thread, it has a separate connection.
+    That connection is closed afterwards, as the worker thread is reused for other counts.
+    """
+    try:
+        return queryset.count()
+    finally:
+        connections[queryset.db].close()
+
+
+def get_estimated_count(queryset) -> Optional[int]:
+    """Tell how many rows the PostgreSQL query planner expects for the queryset.
+    This returns ``None`` when no estimate is available.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    query = queryset.query
+    if not query.where and not query.distinct and not query.combinator:
+        return _get_table_estimate(connection, query.get_meta().db_table)
+    else:
+        return _get_explain_estimate(connection, queryset)
+
+
+def _get_table_estimate(connection, db_table) -> Optional[int]:
+    """Read the number of rows of the last ``ANALYZE`` / ``VACUUM`` of the table."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", [db_table])
+        row = cursor.fetchone()
+
+    # The reltuples is -1 (or 0 on older versions) when the table was never analyzed.
+    return int(row[0]) if row is not None and row[0] > 0 else None
+
+
+def _get_explain_estimate(connection, queryset) -> Optional[int]:
+    """Read the row estimate of the query plan."""
+    sql, params = queryset.order_by().query.get_compiler(connection=connection).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
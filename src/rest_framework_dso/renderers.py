@@ -2,31 +2,82 @@
 
 This makes sure the response gets the desired ``application/hal+json``
 """
+import codecs
+import csv
 import inspect
 import itertools
-from datetime import datetime
-from io import BytesIO, StringIO
+import struct
+import time
+from datetime import date, datetime
+from io import StringIO
 from types import GeneratorType
-from typing import Optional
+from typing import Iterator, Optional
 
 import orjson
 from django.conf import settings
-from rest_framework import renderers
+from django.contrib.gis.db import models as gis_models
+from django.contrib.gis.db.models.functions import AsGeoJSON, Transform
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import QuerySet
+from django.utils.html import format_html, urlize
+from rest_framework import renderers, serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.fields import Field, empty
 from rest_framework.relations import HyperlinkedRelatedField
 from rest_framework.serializers import ListSerializer, Serializer, SerializerMethodField
+from rest_framework.settings import api_settings
 from rest_framework.utils.breadcrumbs import get_breadcrumbs as drf_get_breadcrumbs
 from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from rest_framework.utils.urls import replace_query_param
 from rest_framework_csv.renderers import CSVStreamingRenderer
-from rest_framework_gis.fields import GeoJsonDict
+from rest_framework_gis.fields import GeoJsonDict, GeometryField
 
 from rest_framework_dso import pagination
-from rest_framework_dso.crs import WGS84
-from rest_framework_dso.fields import GeoJSONIdentifierField
+from rest_framework_dso.crs import CRS, WGS84
+from rest_framework_dso.fields import (
+    GeoJSONAnnotationField,
+    GeoJSONFragment,
+    GeoJSONIdentifierField,
+)
+from rest_framework_dso.paginator import DeferredValue
 from rest_framework_dso.serializer_helpers import ReturnGenerator
 
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import flatbuffers
+    import numpy
+except ImportError:
+    flatbuffers = None
+
 BROWSABLE_MAX_PAGE_SIZE = 1000
+BROWSABLE_PREVIEW_SIZE = 100
+BROWSABLE_CONTENT_MARKER = "DSO-BROWSABLE-API-CONTENT"
 DEFAULT_CHUNK_SIZE = 4096
+DEFAULT_CHUNK_DELAY = 0.2  # in seconds
+
+FLATGEOBUF_MAGIC = b"fgb\x03fgb\x00"  # version 3.0
+FLATGEOBUF_GEOMETRY_TYPES = {
+    "POINT": 1,
+    "LINESTRING": 2,
+    "POLYGON": 3,
+    "MULTIPOINT": 4,
+    "MULTILINESTRING": 5,
+    "MULTIPOLYGON": 6,
+    "GEOMETRYCOLLECTION": 7,
+}
+FLATGEOBUF_BOOL = 2
+FLATGEOBUF_LONG = 7
+FLATGEOBUF_DOUBLE = 10
+FLATGEOBUF_STRING = 11
+FLATGEOBUF_JSON = 12
+FLATGEOBUF_DATETIME = 13
 
 
 def get_data_serializer(data) -> Optional[Serializer]:
@@ -51,11 +102,18 @@ class RendererMixin:
     supports_inline_embeds = False
     supports_m2m = True
     compatible_paginator_classes = None
+    #: Whether the pagination count is written at the end, so it can be calculated meanwhile.
+    supports_deferred_count = False
+    #: Whether the complete response can be shared with other users by the response cache.
+    cacheable = True
     content_disposition: Optional[str] = None
     default_crs = None
     paginator = None
 
+    #: The output is flushed when the buffer exceeds this number of bytes
     chunk_size = DEFAULT_CHUNK_SIZE  # allow to overrule in unit tests
+    #: The output is also flushed when the buffered data is kept longer than this (in seconds)
+    chunk_delay = DEFAULT_CHUNK_DELAY
 
     def setup_pagination(self, paginator: pagination.DelegatedPageNumberPagination):
         """Used by DelegatedPageNumberPagination"""
@@ -68,6 +126,12 @@ class RendererMixin:
         """
         pass
 
+    def tune_queryset(self, queryset, request):
+        """Allow to optimize the queryset for the output format (e.g. add annotations).
+        This hook is called before the queryset is paginated or passed to the serializer.
+        """
+        return queryset
+
     def render_exception(self, exception):
         """Inform the client that the stream processing was interrupted with an exception.
         The exception can be rendered in the format fits with the output.
@@ -102,6 +166,17 @@ class RendererMixin:
 
 class BrowsableAPIRenderer(RendererMixin, renderers.BrowsableAPIRenderer):
     template = "dso_api/dynamic_api/api.html"
+    #: The HTML page contains the CSRF token and login details of the user.
+    cacheable = False
+
+    #: The number of records that is shown in the HTML preview of a listing.
+    preview_size = BROWSABLE_PREVIEW_SIZE
+
+    def __init__(self):
+        super().__init__()
+        self._content = None
+        self._is_truncated = False
+        self._is_page_size_checked = False
 
     def get_context(self, data, accepted_media_type, renderer_context):
         context = super().get_context(data, accepted_media_type, renderer_context)
@@ -114,15 +189,36 @@ class BrowsableAPIRenderer(RendererMixin, renderers.BrowsableAPIRenderer):
         return context
 
     def get_content(self, renderer, data, accepted_media_type, renderer_context):
-        """Fix showing generator content for browsable API, convert back to one string"""
-        content = super().get_content(renderer, data, accepted_media_type, renderer_context)
-        if inspect.isgenerator(content):
-            # Convert back to string. Might become a very large response!
-            sample = StringIO()
-            sample.writelines(map(bytes.decode, content))
-            content = sample.getvalue()
+        """Render a preview of the content, which is streamed inside the HTML template.
+        This only returns a placeholder, the content is written by :meth:`render`.
+        """
+        data = self._get_preview_data(data)
+        self._content = super().get_content(renderer, data, accepted_media_type, renderer_context)
+        return BROWSABLE_CONTENT_MARKER
+
+    def _get_preview_data(self, data):
+        """Limit the listings in the data, so only the first records are rendered."""
+        if isinstance(data, dict) and isinstance(data.get("_embedded"), dict):
+            preview = data.copy()  # keeps ReturnDict.serializer
+            preview["_embedded"] = {
+                name: self._get_preview_data(value) for name, value in data["_embedded"].items()
+            }
+            return preview
+        elif isinstance(data, (GeneratorType, ReturnGenerator)):
+            serializer = getattr(data, "serializer", None)
+            return ReturnGenerator(self._limit_preview(data), serializer=serializer)
+        else:
+            return data
 
-        return content
+    def _limit_preview(self, items):
+        """Yield the first records of a listing.
+        This doesn't check whether there is a next item, as that would read an extra record.
+        """
+        for num, item in enumerate(items, start=1):
+            yield item
+            if num >= self.preview_size:
+                self._is_truncated = True
+                return
 
     def get_breadcrumbs(self, request):
         """
@@ -137,13 +233,78 @@ class BrowsableAPIRenderer(RendererMixin, renderers.BrowsableAPIRenderer):
         return breadcrumbs
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
-        # Protect the browsable API from being used as DOS (Denial of Service) attack vector.
-        # While we allow infinitely large pages in our streaming responses, the browsable API
-        # still has to render that in-memory as part of the HTML template response.
+        """Render the HTML page, while streaming the content preview inside the template.
+        This avoids building the whole page in memory.
+        """
+        self._check_page_size(renderer_context)
+        html = super().render(
+            data,
+            accepted_media_type=accepted_media_type,
+            renderer_context=renderer_context,
+        )
+
+        # Make sure the browsable API always returns text/html
+        # by default it falls back to the current media,
+        # unless the response (e.g. exception_handler) has overwritten the type.
+        # For streaming responses, this is also done in finalize_response().
+        response = renderer_context["response"]
+        response["content-type"] = "text/html; charset=utf-8"
+
+        head, marker, tail = html.partition(BROWSABLE_CONTENT_MARKER)
+        yield head.encode()
+        if marker:
+            yield from self._render_content(self._content)
+            yield from self._render_preview_notice(renderer_context["request"])
+        yield tail.encode()
+
+    def _render_content(self, content):
+        """Write the escaped content, in the same way the template does with ``|urlize``.
+        The text is only split on whitespace, so URLs (and multibyte characters)
+        that cross a chunk boundary are converted as a whole.
+        """
+        if not inspect.isgenerator(content):
+            content = [content]
+
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        pending = ""
+        for chunk in content:
+            pending += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            split = max(pending.rfind("\n"), pending.rfind(" ")) + 1
+            if split:
+                yield urlize(pending[:split], nofollow=True, autoescape=True).encode()
+                pending = pending[split:]
+
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield urlize(pending, nofollow=True, autoescape=True).encode()
+
+    def _render_preview_notice(self, request):
+        """Tell that the listing was cut short, with a link to the full JSON response."""
+        if self._is_truncated:
+            full_url = replace_query_param(
+                request.build_absolute_uri(), api_settings.URL_FORMAT_OVERRIDE, "json"
+            )
+            yield format_html(
+                "\n\n/* This preview only shows the first {} records, see {} for all data. */",
+                self.preview_size,
+                format_html('<a href="{0}" rel="nofollow">{0}</a>', full_url),
+            ).encode()
+
+    def _check_page_size(self, renderer_context):
+        """Protect the browsable API from being used as DOS (Denial of Service) attack vector.
+        While we allow infinitely large pages in our streaming responses,
+        the database still has to process the page for the HTML template response.
+
+        Streaming responses are already checked by :meth:`finalize_response`,
+        other responses are checked when they are rendered.
+        """
         from rest_framework.generics import GenericAPIView  # circular import via DRF settings
 
         request = renderer_context["request"]
         view = renderer_context["view"]
+        if self._is_page_size_checked:
+            return
+
         if (
             isinstance(view, GenericAPIView)
             and view.paginator.get_page_size(request) > BROWSABLE_MAX_PAGE_SIZE
@@ -151,27 +312,23 @@ class BrowsableAPIRenderer(RendererMixin, renderers.BrowsableAPIRenderer):
             raise ValidationError(
                 "Browsable HTML API does not support this page size.", code="_pageSize"
             )
+        self._is_page_size_checked = True
 
-        ret = super().render(
-            data,
-            accepted_media_type=accepted_media_type,
-            renderer_context=renderer_context,
-        )
-
-        # Make sure the browsable API always returns text/html
-        # by default it falls back to the current media,
-        # unless the response (e.g. exception_handler) has overwritten the type.
-        response = renderer_context["response"]
+    def finalize_response(self, response, renderer_context: dict):
+        """Check the request before the streaming response is read."""
+        self._check_page_size(response.renderer_context)
         response["content-type"] = "text/html; charset=utf-8"
-        return ret
+        return super().finalize_response(response, renderer_context)
 
 
 class HALJSONRenderer(RendererMixin, renderers.JSONRenderer):
     media_type = "application/hal+json"
     chunk_size = 4096
+    items_per_write = 100  # number of list items that are encoded in one go.
 
     # Define the paginator per media type.
     compatible_paginator_classes = [pagination.DSOPageNumberPagination]
+    supports_deferred_count = True
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
         """Render the data as streaming."""
@@ -182,7 +339,9 @@ class HALJSONRenderer(RendererMixin, renderers.JSONRenderer):
         if indent:
             yield self._render_json_indented(data)
         else:
-            yield from _chunked_output(self._render_json(data), chunk_size=self.chunk_size)
+            yield from _chunked_output(
+                self._render_json(data), chunk_size=self.chunk_size, max_delay=self.chunk_delay
+            )
 
     def _render_json_indented(self, data):
         """Render indented JSON for the browsable API"""
@@ -194,40 +353,51 @@ class HALJSONRenderer(RendererMixin, renderers.JSONRenderer):
                 if isinstance(value, (ReturnGenerator, GeneratorType, itertools.chain)):
                     embedded[key] = list(value)
 
-        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        return orjson.dumps(data, default=_resolve_deferred, option=orjson.OPT_INDENT_2)
 
     def _render_json(self, data, level=0):
         if not data:
             yield orjson.dumps(data)
             return
         elif isinstance(data, dict):
-            # Streaming output per key, which can be a whole list in case of embedding
+            # Only values that hold a stream (e.g. the rows in the "_embedded" section)
+            # are written piece by piece. Everything else in the envelope (e.g. "_links"
+            # and "page") is encoded in a single call, orjson preserves the dict ordering.
             yield b"{"
             sep = b"\n  "
             for key, value in data.items():
-                if hasattr(data, "__iter__") and not isinstance(data, str):
+                if _is_stream(value):
                     # Recurse streaming for actual complex values.
                     yield b"%b%b:" % (sep, orjson.dumps(key))
                     yield from self._render_json(value, level=level + 1)
                 else:
-                    yield b"%b%b:%b" % (sep, orjson.dumps(key), orjson.dumps(value))
+                    value = orjson.dumps(value, default=_resolve_deferred)
+                    yield b"%b%b:%b" % (sep, orjson.dumps(key), value)
                 sep = b",\n  "
             yield b"\n}"
         elif hasattr(data, "__iter__") and not isinstance(data, str):
-            # Streaming per item, outputs each record on a new row.
-            yield b"["
-            sep = b"\n  "
-            for item in data:
-                yield b"%b%b" % (sep, orjson.dumps(item))
-                sep = b",\n  "
-
-            yield b"\n]"
+            yield from self._render_json_list(data)
         else:
             yield orjson.dumps(data)
 
         if not level:
             yield b"\n"
 
+    def _render_json_list(self, data):
+        """Streaming per item, outputs each record on a new row.
+        Each record is encoded with a single orjson.dumps() call, and records are
+        joined in small batches to reduce the overhead of yielding every row.
+        """
+        items = iter(data)
+        first_item = next(items, empty)
+        if first_item is empty:
+            yield b"[]"
+        else:
+            yield b"[\n  %b" % orjson.dumps(first_item)
+            while batch := list(itertools.islice(items, self.items_per_write)):
+                yield b",\n  " + b",\n  ".join(map(orjson.dumps, batch))
+            yield b"\n]"
+
 
 class CSVRenderer(RendererMixin, CSVStreamingRenderer):
     """Overwritten CSV renderer to provide proper headers.
@@ -244,6 +414,8 @@ class CSVRenderer(RendererMixin, CSVStreamingRenderer):
     supports_m2m = False
     compatible_paginator_classes = [pagination.DSOHTTPHeaderPageNumberPagination]
     content_disposition = 'attachment; filename="{filename}.csv"'
+    chunk_size = 65536  # bulk exports, write in larger blocks
+    items_per_write = 100  # number of rows that are written in one go.
 
     def tune_serializer(self, serializer: Serializer):
         # Serializer type is known, introduce better CSV header column.
@@ -288,15 +460,34 @@ class CSVRenderer(RendererMixin, CSVStreamingRenderer):
 
     def render(self, data, media_type=None, renderer_context=None):
         if (serializer := get_data_serializer(data)) is not None:
+            # Serializer type is known, so the flattening of each row can be determined
+            # once, instead of the generic flattening that CSVStreamingRenderer does per row.
             header, labels = self._get_csv_header(serializer)
-            renderer_context = {**(renderer_context or {}), "header": header, "labels": labels}
-
-        output = super().render(data, media_type=media_type, renderer_context=renderer_context)
+            output = self._render_csv(data, header, labels)
+        else:
+            output = super().render(data, media_type=media_type, renderer_context=renderer_context)
 
         # This method must have a "yield" statement so finalize_response() can
         # recognize this renderer returns a generator/stream, and patch the
         # response.streaming attribute accordingly.
-        yield from _chunked_output(output, chunk_size=self.chunk_size)
+        yield from _chunked_output(output, chunk_size=self.chunk_size, max_delay=self.chunk_delay)
+
+    def _render_csv(self, data, header: list, labels: dict):
+        """Write the rows using the standard library CSV writer."""
+        if isinstance(data, dict):
+            data = [data]  # detail page
+
+        get_row = _get_csv_row_getter(header)
+        buffer = StringIO()
+        writer = csv.writer(buffer, **(self.writer_opts or {}))
+        writer.writerow([labels.get(name, name) for name in header])
+
+        items = iter(data)
+        while buffer.tell():
+            yield buffer.getvalue().encode(settings.DEFAULT_CHARSET)
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(map(get_row, itertools.islice(items, self.items_per_write)))
 
     def render_exception(self, exception: Exception):
         """Inform clients that the stream was interrupted by an exception.
@@ -309,6 +500,165 @@ class CSVRenderer(RendererMixin, CSVStreamingRenderer):
             return f"\n\nAborted by {exception.__class__.__name__} during rendering!\n"
 
 
+class NDJSONRenderer(RendererMixin, renderers.JSONRenderer):
+    """Write the results as newline-delimited JSON (also known as JSON Lines).
+
+    Each object is written on a separate line, without any envelope.
+    This allows clients to process bulk exports line by line with constant memory.
+    Embedded relations are included inline, just like the CSV export does.
+    """
+
+    unlimited_page_size = True
+    supports_list_embeds = False
+    supports_detail_embeds = True
+    supports_inline_embeds = True
+    supports_m2m = False
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    compatible_paginator_classes = [pagination.DSOHTTPHeaderPageNumberPagination]
+    content_disposition = 'attachment; filename="{filename}.ndjson"'
+    chunk_size = 65536  # bulk exports, write in larger blocks
+    items_per_write = 100  # number of objects that are encoded in one go.
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as streaming."""
+        if data is None:
+            return
+
+        yield from _chunked_output(
+            self._render_ndjson(data), chunk_size=self.chunk_size, max_delay=self.chunk_delay
+        )
+
+    def _render_ndjson(self, data):
+        if isinstance(data, dict):
+            # Detail page
+            yield b"%b\n" % orjson.dumps(data)
+            return
+
+        # Read the generator from the list serializer in small batches.
+        items = iter(data)
+        while batch := list(itertools.islice(items, self.items_per_write)):
+            yield b"".join(b"%b\n" % orjson.dumps(item) for item in batch)
+
+    def render_exception(self, exception):
+        """Inform clients that the stream was interrupted by an exception.
+        This is written as a separate line, which will fail parsing as JSON object.
+        """
+        if settings.DEBUG:
+            return f"\nAborted by {exception.__class__.__name__}: {exception}\n"
+        else:
+            return f"\nAborted by {exception.__class__.__name__} during rendering!\n"
+
+
+class ArrowRenderer(RendererMixin, renderers.BaseRenderer):
+    """Write the results as Apache Arrow record batches (IPC streaming format).
+
+    This columnar format can be read directly by pandas/pyarrow, which avoids
+    parsing large CSV or JSON exports on the client side. The column types are
+    derived from the Amsterdam Schema field types when the model provides these.
+    Geometries are written as (extended) well-known binary.
+    """
+
+    unlimited_page_size = True
+    supports_list_embeds = False
+    supports_detail_embeds = False
+    supports_inline_embeds = False
+    supports_m2m = False
+    media_type = "application/vnd.apache.arrow.stream"
+    format = "arrow"
+    charset = None
+    render_style = "binary"
+
+    compatible_paginator_classes = [pagination.DSOHTTPHeaderPageNumberPagination]
+    content_disposition = 'attachment; filename="{filename}.arrow"'
+    chunk_size = 65536  # bulk exports, write in larger blocks
+    batch_size = 1000  # number of rows in a single record batch.
+
+    def tune_serializer(self, serializer: Serializer):
+        """Only keep the fields that can be written as a column."""
+        serializer.fields = _get_column_fields(serializer)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as streaming."""
+        if data is None:
+            return
+
+        if pyarrow is None:
+            raise ImproperlyConfigured(
+                f"The {self.format} format requires pyarrow to be installed"
+            )
+
+        yield from _chunked_output(
+            self._render_batches(data), chunk_size=self.chunk_size, max_delay=self.chunk_delay
+        )
+
+    def _render_batches(self, data):
+        serializer = get_data_serializer(data)
+        columns = _get_arrow_columns(serializer) if serializer is not None else None
+        if isinstance(data, dict):
+            data = [data]  # detail page
+
+        # The first batch is also written for empty data, so the schema is still written.
+        items = iter(data)
+        batch = list(itertools.islice(items, self.batch_size))
+        if columns is None:
+            # No serializer to tell the types, let pyarrow detect these from the first batch.
+            columns = dict.fromkeys(batch[0] if batch else (), (None, None))
+
+        record_batch = _to_record_batch(batch, columns)
+        columns = {
+            field.name: (field.type, columns[field.name][1]) for field in record_batch.schema
+        }
+
+        sink = _BytesSink()
+        writer = self._open_writer(sink, record_batch.schema)
+        try:
+            while batch:
+                self._write_batch(writer, record_batch)
+                yield sink.read_written()
+
+                batch = list(itertools.islice(items, self.batch_size))
+                record_batch = _to_record_batch(batch, columns)
+        finally:
+            writer.close()
+
+        yield sink.read_written()
+
+    def _open_writer(self, sink, schema):
+        return pyarrow.ipc.new_stream(sink, schema)
+
+    def _write_batch(self, writer, record_batch):
+        writer.write_batch(record_batch)
+
+    def render_exception(self, exception):
+        """The binary stream is broken anyway, write a readable message for debugging."""
+        if settings.DEBUG:
+            return f"\nAborted by {exception.__class__.__name__}: {exception}\n"
+        else:
+            return f"\nAborted by {exception.__class__.__name__} during rendering!\n"
+
+
+class ParquetRenderer(ArrowRenderer):
+    """Write the results as Apache Parquet file.
+
+    Each batch of rows is written as a separate row group, so the file can be
+    streamed while the footer (with the file metadata) is written at the end.
+    """
+
+    media_type = "application/vnd.apache.parquet"
+    format = "parquet"
+    content_disposition = 'attachment; filename="{filename}.parquet"'
+    batch_size = 10000  # larger row groups compress better
+
+    def _open_writer(self, sink, schema):
+        return pyarrow.parquet.ParquetWriter(sink, schema)
+
+    def _write_batch(self, writer, record_batch):
+        writer.write_table(pyarrow.Table.from_batches([record_batch]))
+
+
 class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
     """Convert the output into GeoJSON notation."""
 
@@ -320,13 +670,63 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
 
     default_crs = WGS84  # GeoJSON always defaults to WGS84 (EPSG:4326).
     compatible_paginator_classes = [pagination.DelegatedPageNumberPagination]
+    supports_deferred_count = True
     content_disposition = 'attachment; filename="{filename}.json"'
+    chunk_size = 65536  # bulk exports, write in larger blocks
+
+    #: The number of decimals when the database encodes the geometries.
+    #: (that happens when the ``DSO_GEOJSON_DATABASE_ENCODING`` setting is enabled).
+    geometry_precision = 9
+
+    def __init__(self):
+        super().__init__()
+        self._encoded_geometry_fields = {}
+
+    def tune_queryset(self, queryset, request):
+        """Let the database encode the geometries as GeoJSON when this is enabled.
+        This avoids loading each geometry into a GEOS object, and the conversions in Python.
+        """
+        if not getattr(settings, "DSO_GEOJSON_DATABASE_ENCODING", False):
+            return queryset
+
+        accept_crs = getattr(request, "accept_crs", None)
+        annotations = {}
+        for model_field in queryset.model._meta.concrete_fields:
+            if isinstance(model_field, gis_models.GeometryField):
+                geometry = model_field.name
+                if accept_crs is not None:
+                    geometry = Transform(geometry, accept_crs.srid)
+
+                annotation = f"{model_field.name}_geojson"
+                annotations[annotation] = AsGeoJSON(geometry, precision=self.geometry_precision)
+                self._encoded_geometry_fields[model_field.name] = annotation
+
+        if not annotations:
+            return queryset
+
+        # The geometry columns are deferred by tune_serializer(), once it's known
+        # which serializer fields use the annotations.
+        return queryset.annotate(**annotations)
 
     def tune_serializer(self, serializer: Serializer):
         """Remove unused fields from the serializer:"""
-        serializer.fields = {
-            name: field for name, field in serializer.fields.items() if name != "_links"
-        }
+        fields = {}
+        encoded_sources = []
+        for name, field in serializer.fields.items():
+            if name == "_links":
+                continue
+            elif encoded_field := self._get_encoded_geometry_field(name, field, serializer):
+                encoded_sources.append(field.source)
+                field = encoded_field
+            fields[name] = field
+        serializer.fields = fields
+
+        # The geometries which are read from the annotation no longer need to be retrieved.
+        # Fields that still render the geometry in Python (e.g. permission transforms) read
+        # the model field, hence those columns are not deferred to avoid a query per object.
+        list_serializer = serializer.parent
+        if encoded_sources and isinstance(getattr(list_serializer, "instance", None), QuerySet):
+            list_serializer.instance = list_serializer.instance.defer(*encoded_sources)
 
         # Inject an extra field in the serializer to retrieve the object ID.
         if serializer.Meta.model:
@@ -334,6 +734,20 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
             id_field.bind("__id__", serializer)
             serializer.fields["__id__"] = id_field
 
+    def _get_encoded_geometry_field(self, name, field, serializer) -> Optional[Field]:
+        """Replace the geometry field when the database already encoded the geometry.
+        Fields which have a permission-based transformation are left as-is.
+        """
+        if (
+            isinstance(field, GeometryField)
+            and (annotation := self._encoded_geometry_fields.get(field.source))
+            and "to_representation" not in field.__dict__
+        ):
+            encoded_field = GeoJSONAnnotationField(source=annotation)
+            encoded_field.bind(name, serializer)
+            return encoded_field
+        return None
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
         """
         Render `data` into JSON, returning a bytestring.
@@ -342,7 +756,11 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
             return b""
 
         request = renderer_context.get("request") if renderer_context else None
-        yield from _chunked_output(self._render_geojson(data, request), chunk_size=self.chunk_size)
+        yield from _chunked_output(
+            self._render_geojson(data, request),
+            chunk_size=self.chunk_size,
+            max_delay=self.chunk_delay,
+        )
 
     def _render_geojson(self, data, request=None):
         # Detect what kind of data is actually provided:
@@ -367,12 +785,7 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
     def _render_geojson_detail(self, data, request=None):
         # Not a list view. (_embed may also occur in detail views).
         geometry_field = self._find_geometry_field(data)
-        return orjson.dumps(
-            {
-                **self._item_to_feature(data, geometry_field),
-                **self._get_crs(request),
-            }
-        )
+        return self._render_feature(data, geometry_field, **self._get_crs(request))
 
     def _render_geojson_list(self, collections, request=None):
         # Learned a trick from django-gisserver: write GeoJSON in bits.
@@ -401,9 +814,9 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
             geometry_field = self._find_geometry_field(first_feature)
 
             # Output all features, with separator in between.
-            yield orjson.dumps(self._item_to_feature(first_feature, geometry_field))
+            yield self._render_feature(first_feature, geometry_field)
             yield from (
-                b",\n    %b" % orjson.dumps(self._item_to_feature(feature, geometry_field))
+                b",\n    %b" % self._render_feature(feature, geometry_field)
                 for feature in features_iter
             )
 
@@ -433,24 +846,36 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
         Only old 2008 GeoJSON used this, but using it since the DSO API allows
         to negotiate the CRS it's included.
         """
-        if request is not None:
-            # Detect which Coordinate Reference System the response is written in.
-            accept_crs = getattr(request, "accept_crs", None)
-            content_crs = getattr(request, "response_content_crs", None) or accept_crs
-
-            if content_crs is not None:
-                return {
-                    "crs": {
-                        "type": "name",
-                        "properties": {"name": str(content_crs)},
-                    }
+        content_crs = self._get_content_crs(request)
+        if content_crs is not None:
+            return {
+                "crs": {
+                    "type": "name",
+                    "properties": {"name": str(content_crs)},
                 }
+            }
 
         return {}
 
+    def _get_content_crs(self, request) -> Optional[CRS]:
+        """Detect which Coordinate Reference System the response is written in."""
+        if request is None:
+            return None
+
+        accept_crs = getattr(request, "accept_crs", None)
+        return getattr(request, "response_content_crs", None) or accept_crs
+
     def _get_footer(self):
         """Generate the last fields of the response."""
-        return {"_links": self._get_links()}
+        footer = {"_links": self._get_links()}
+        if (
+            self.paginator is not None
+            and (count := self.paginator.get_deferred_count()) is not None
+        ):
+            # The count was calculated while the features were written.
+            # Without a deferred count, it's only given in the X-Total-Count header.
+            footer["numberMatched"] = count.resolve()
+        return footer
 
     def _get_links(self) -> list:
         """Generate the pagination links"""
@@ -480,6 +905,21 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
 
         return links
 
+    def _render_feature(self, item: dict, geometry_field, **extra) -> bytes:
+        """Write a single feature.
+        A geometry that is already encoded by the database is written as-is.
+        """
+        feature = {**self._item_to_feature(item, geometry_field), **extra}
+        geometry = feature.get("geometry")
+        if not isinstance(geometry, GeoJSONFragment):
+            return orjson.dumps(feature)
+
+        # orjson can't write raw JSON values, so splice it into the output.
+        # The geometry is written before the properties, so the first match is the placeholder.
+        feature["geometry"] = None
+        head, tail = orjson.dumps(feature).split(b'"geometry":null', 1)
+        return b'%b"geometry":%b%b' % (head, geometry, tail)
+
     def _item_to_feature(self, item: dict, geometry_field):
         """Reorganize the dict of a single item."""
         id_value = item.pop("__id__", None)
@@ -497,30 +937,494 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
     def _find_geometry_field(self, properties: dict):
         """Find the first field which contains the geometry of a feature."""
         return next(
-            (key for key, value in properties.items() if isinstance(value, GeoJsonDict)),
+            (
+                key
+                for key, value in properties.items()
+                if isinstance(value, (GeoJsonDict, GeoJSONFragment))
+            ),
             None,
         )
 
 
-def _chunked_output(stream, chunk_size=DEFAULT_CHUNK_SIZE, write_exception=None):
+class FlatGeobufRenderer(GeoJSONRenderer):
+    """Write the results as FlatGeobuf, a binary format for geographic features.
+
+    This is much faster to parse for GIS applications than GeoJSON.
+    The features are written without a spatial index, so the file can be
+    streamed while the features are read from the database.
+    """
+
+    supports_list_embeds = False
+    supports_detail_embeds = False
+    supports_inline_embeds = False
+    supports_m2m = False
+    supports_deferred_count = False
+    media_type = "application/flatgeobuf"
+    format = "flatgeobuf"
+    charset = None
+    render_style = "binary"
+
+    default_crs = None  # Keep the stored CRS, unless the Accept-Crs header is given.
+    compatible_paginator_classes = [pagination.DSOHTTPHeaderPageNumberPagination]
+    content_disposition = 'attachment; filename="{filename}.fgb"'
+
+    def tune_queryset(self, queryset, request):
+        """The geometries are read as GeoJSON data, not encoded by the database."""
+        return queryset
+
+    def tune_serializer(self, serializer: Serializer):
+        """Only keep the fields that can be written as a column."""
+        serializer.fields = _get_column_fields(serializer)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as streaming."""
+        if data is None:
+            return
+
+        if flatbuffers is None:
+            raise ImproperlyConfigured(
+                f"The {self.format} format requires flatbuffers and numpy to be installed"
+            )
+
+        request = renderer_context.get("request") if renderer_context else None
+        yield from _chunked_output(
+            self._render_flatgeobuf(data, request),
+            chunk_size=self.chunk_size,
+            max_delay=self.chunk_delay,
+        )
+
+    def _render_flatgeobuf(self, data, request=None):
+        serializer = get_data_serializer(data)
+        if isinstance(data, dict):
+            data = [data]  # detail page
+
+        # Reading the first feature also performs the CRS detection inside the serializer.
+        features = iter(data)
+        first_feature = next(features, None)
+        geometry_field = (
+            self._find_geometry_field(first_feature) if first_feature is not None else None
+        )
+
+        if serializer is not None:
+            columns = {
+                name: _get_flatgeobuf_column_type(field)
+                for name, field in serializer.fields.items()
+                if name != geometry_field
+            }
+            geometry_type = _get_flatgeobuf_geometry_type(serializer, geometry_field)
+        else:
+            columns = {
+                name: _get_flatgeobuf_value_type(value)
+                for name, value in (first_feature or {}).items()
+                if name != geometry_field
+            }
+            geometry_type = 0  # unknown
+
+        yield FLATGEOBUF_MAGIC
+        yield _build_flatgeobuf_header(
+            geometry_type, columns, content_crs=self._get_content_crs(request)
+        )
+        if first_feature is None:
+            return
+
+        write_properties = _get_flatgeobuf_properties_writer(columns)
+        for feature in itertools.chain([first_feature], features):
+            yield _build_flatgeobuf_feature(feature.get(geometry_field), write_properties(feature))
+
+    def render_exception(self, exception):
+        """The binary stream is broken anyway, write a readable message for debugging."""
+        if settings.DEBUG:
+            return f"\nAborted by {exception.__class__.__name__}: {exception}\n"
+        else:
+            return f"\nAborted by {exception.__class__.__name__} during rendering!\n"
+
+
+def _resolve_deferred(value):
+    """Let orjson write values that are calculated by a worker thread."""
+    if isinstance(value, DeferredValue):
+        return value.resolve()
+    raise TypeError
+
+
+def _is_stream(value) -> bool:
+    """Tell whether the value contains a generator that needs to be rendered as a stream."""
+    if isinstance(value, dict):
+        return any(_is_stream(sub_value) for sub_value in value.values())
+    return isinstance(value, (ReturnGenerator, Iterator))
+
+
+class _BytesSink:
+    """A write-only file object that collects the data pyarrow writes to it."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def read_written(self) -> bytes:
+        """Return all data that was written since the previous call."""
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _get_arrow_columns(serializer: Serializer) -> dict:
+    """Tell which Arrow type and value conversion is used for each serializer field."""
+    model = getattr(getattr(serializer, "Meta", None), "model", None)
+    columns = {}
+    for name, field in serializer.fields.items():
+        field_schema = None
+        if model is not None and field.source and "." not in field.source:
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                pass
+            else:
+                if not model_field.is_relation:
+                    # Dynamic models carry the Amsterdam Schema definition of each field.
+                    field_schema = getattr(model_field, "field_schema", None)
+
+        if field_schema is not None:
+            columns[name] = _get_schema_arrow_type(field_schema)
+        else:
+            columns[name] = _get_field_arrow_type(field)
+    return columns
+
+
+def _get_schema_arrow_type(field_schema) -> tuple:
+    """Translate the Amsterdam Schema field type to an Arrow type."""
+    if field_schema.is_geo:
+        return pyarrow.binary(), _to_ewkb
+    elif field_schema.type == "integer":
+        return pyarrow.int64(), None
+    elif field_schema.type == "number":
+        return pyarrow.float64(), float  # decimals are rendered as string
+    elif field_schema.type == "boolean":
+        return pyarrow.bool_(), None
+    elif field_schema.type == "string" and field_schema.format == "date":
+        return pyarrow.date32(), date.fromisoformat
+    elif field_schema.type == "string" and field_schema.format == "date-time":
+        return pyarrow.timestamp("us"), _parse_datetime
+    elif field_schema.type in ("object", "array"):
+        return pyarrow.string(), _dump_json
+    else:
+        return pyarrow.string(), str
+
+
+def _get_field_arrow_type(field) -> tuple:
+    """Translate the serializer field type to an Arrow type."""
+    if isinstance(field, GeometryField):
+        return pyarrow.binary(), _to_ewkb
+    elif isinstance(field, serializers.BooleanField):
+        return pyarrow.bool_(), None
+    elif isinstance(field, serializers.IntegerField):
+        return pyarrow.int64(), None
+    elif isinstance(field, (serializers.FloatField, serializers.DecimalField)):
+        return pyarrow.float64(), float
+    elif isinstance(field, serializers.DateTimeField):
+        return pyarrow.timestamp("us"), _parse_datetime
+    elif isinstance(field, serializers.DateField):
+        return pyarrow.date32(), date.fromisoformat
+    elif isinstance(field, (serializers.DictField, serializers.JSONField)):
+        return pyarrow.string(), _dump_json
+    else:
+        return pyarrow.string(), str
+
+
+def _parse_datetime(value: str) -> datetime:
+    # The "Z" suffix for UTC is not supported by fromisoformat() in Python 3.9.
+    return datetime.fromisoformat(value[:-1] + "+00:00" if value[-1] == "Z" else value)
+
+
+def _dump_json(value) -> str:
+    return orjson.dumps(value).decode()
+
+
+def _to_ewkb(value) -> bytes:
+    """Convert a geometry to (extended) well-known binary.
+    The ``DSOGeometryField`` already does this, other serializer fields
+    give a GEOS geometry or GeoJSON dict (e.g. the ``GeometryField`` of rest_framework_gis).
+    """
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value)
+    elif not isinstance(value, GEOSGeometry):
+        value = GEOSGeometry(_dump_json(value))
+    return bytes(value.ewkb)
+
+
+def _to_record_batch(rows: list, columns: dict):
+    """Convert the rendered rows into a single Arrow record batch.
+    Without a known type (columns[name] is None), pyarrow detects the type.
+    """
+    arrays = []
+    for name, (arrow_type, converter) in columns.items():
+        values = [row.get(name) for row in rows]
+        if converter is not None:
+            values = [converter(value) if value is not None else None for value in values]
+        arrays.append(pyarrow.array(values, type=arrow_type))
+
+    return pyarrow.RecordBatch.from_arrays(arrays, names=list(columns))
+
+
+def _get_column_fields(serializer: Serializer) -> dict:
+    """Tell which fields can be written as a column in a tabular format."""
+    return {
+        name: field
+        for name, field in serializer.fields.items()
+        if name not in ("schema", "_links")
+        and not isinstance(
+            field,
+            (HyperlinkedRelatedField, SerializerMethodField, Serializer, ListSerializer),
+        )
+    }
+
+
+def _get_flatgeobuf_column_type(field) -> int:
+    """Translate the serializer field type to a FlatGeobuf column type."""
+    if isinstance(field, serializers.BooleanField):
+        return FLATGEOBUF_BOOL
+    elif isinstance(field, serializers.IntegerField):
+        return FLATGEOBUF_LONG
+    elif isinstance(field, (serializers.FloatField, serializers.DecimalField)):
+        return FLATGEOBUF_DOUBLE  # decimals are rendered as string
+    elif isinstance(field, (serializers.DateTimeField, serializers.DateField)):
+        return FLATGEOBUF_DATETIME  # ISO 8601 value
+    elif isinstance(
+        field, (serializers.DictField, serializers.JSONField, serializers.ListField, GeometryField)
+    ):
+        return FLATGEOBUF_JSON
+    else:
+        return FLATGEOBUF_STRING
+
+
+def _get_flatgeobuf_value_type(value) -> int:
+    """Tell which FlatGeobuf column type fits with a value (when there is no serializer)."""
+    if isinstance(value, bool):
+        return FLATGEOBUF_BOOL
+    elif isinstance(value, int):
+        return FLATGEOBUF_LONG
+    elif isinstance(value, float):
+        return FLATGEOBUF_DOUBLE
+    elif isinstance(value, (dict, list)):
+        return FLATGEOBUF_JSON
+    else:
+        return FLATGEOBUF_STRING
+
+
+def _get_flatgeobuf_geometry_type(serializer: Serializer, geometry_field) -> int:
+    """Tell which geometry type the model field has, this is unknown (0) for mixed types."""
+    model = getattr(getattr(serializer, "Meta", None), "model", None)
+    field = serializer.fields.get(geometry_field)
+    if model is None or field is None:
+        return 0
+
+    try:
+        geom_type = model._meta.get_field(field.source).geom_type
+    except (FieldDoesNotExist, AttributeError):
+        return 0
+    return FLATGEOBUF_GEOMETRY_TYPES.get(geom_type.upper(), 0)
+
+
+def _get_flatgeobuf_properties_writer(columns: dict):
+    """Build the function that encodes the properties of a feature.
+    Each value is written as the column index, followed by the binary value.
+    """
+    encoders = {
+        FLATGEOBUF_BOOL: lambda value: struct.pack("<?", value),
+        FLATGEOBUF_LONG: lambda value: struct.pack("<q", value),
+        FLATGEOBUF_DOUBLE: lambda value: struct.pack("<d", float(value)),
+        FLATGEOBUF_STRING: lambda value: _pack_flatgeobuf_bytes(str(value).encode()),
+        FLATGEOBUF_DATETIME: lambda value: _pack_flatgeobuf_bytes(value.encode()),
+        FLATGEOBUF_JSON: lambda value: _pack_flatgeobuf_bytes(orjson.dumps(value)),
+    }
+    plan = [
+        (name, struct.pack("<H", index), encoders[column_type])
+        for index, (name, column_type) in enumerate(columns.items())
+    ]
+
+    def _write_properties(item: dict) -> bytes:
+        # Null values are written by leaving out the property.
+        return b"".join(
+            [
+                index + encoder(value)
+                for name, index, encoder in plan
+                if (value := item.get(name)) is not None
+            ]
+        )
+
+    return _write_properties
+
+
+def _pack_flatgeobuf_bytes(value: bytes) -> bytes:
+    return struct.pack("<I", len(value)) + value
+
+
+def _build_flatgeobuf_header(geometry_type: int, columns: dict, content_crs=None) -> bytes:
+    """Write the header of a FlatGeobuf file (with size prefix)."""
+    builder = flatbuffers.Builder(1024)
+    column_offsets = []
+    for name, column_type in columns.items():
+        name_offset = builder.CreateString(name)
+        builder.StartObject(11)  # table Column
+        builder.PrependUOffsetTRelativeSlot(0, name_offset, 0)
+        builder.PrependUint8Slot(1, column_type, 0)
+        column_offsets.append(builder.EndObject())
+
+    columns_offset = _create_flatgeobuf_offset_vector(builder, column_offsets)
+    crs_offset = 0  # the default, which omits the field.
+    if content_crs is not None:
+        org_offset = builder.CreateString("EPSG")
+        builder.StartObject(6)  # table Crs
+        builder.PrependUOffsetTRelativeSlot(0, org_offset, 0)
+        builder.PrependInt32Slot(1, content_crs.srid, 0)
+        crs_offset = builder.EndObject()
+
+    builder.StartObject(14)  # table Header
+    builder.PrependUint8Slot(2, geometry_type, 0)
+    builder.PrependUOffsetTRelativeSlot(7, columns_offset, 0)
+    builder.PrependUint16Slot(9, 0, 16)  # no spatial index.
+    builder.PrependUOffsetTRelativeSlot(10, crs_offset, 0)
+    builder.FinishSizePrefixed(builder.EndObject())
+    return bytes(builder.Output())
+
+
+def _build_flatgeobuf_feature(geometry: Optional[dict], properties: bytes) -> bytes:
+    """Write a single feature (with size prefix)."""
+    builder = flatbuffers.Builder(256)
+    geometry_offset = _build_flatgeobuf_geometry(builder, geometry) if geometry else 0
+    properties_offset = builder.CreateByteVector(properties) if properties else 0
+
+    builder.StartObject(3)  # table Feature
+    builder.PrependUOffsetTRelativeSlot(0, geometry_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(1, properties_offset, 0)
+    builder.FinishSizePrefixed(builder.EndObject())
+    return bytes(builder.Output())
+
+
+def _build_flatgeobuf_geometry(builder, geometry: dict) -> int:
+    """Write the GeoJSON geometry data as FlatGeobuf geometry table.
+    Multi-polygons and geometry collections are written as separate parts.
+    """
+    geometry_type = geometry["type"]
+    xy_offset = ends_offset = parts_offset = 0  # the default, which omits the field.
+    if geometry_type == "GeometryCollection":
+        parts = [_build_flatgeobuf_geometry(builder, part) for part in geometry["geometries"]]
+        parts_offset = _create_flatgeobuf_offset_vector(builder, parts)
+    elif geometry_type == "MultiPolygon":
+        parts = [
+            _build_flatgeobuf_geometry(builder, {"type": "Polygon", "coordinates": polygon})
+            for polygon in geometry["coordinates"]
+        ]
+        parts_offset = _create_flatgeobuf_offset_vector(builder, parts)
+    elif geometry_type == "Point":
+        xy_offset = builder.CreateNumpyVector(numpy.array(geometry["coordinates"][:2], "<f8"))
+    elif geometry_type in ("LineString", "MultiPoint"):
+        xy_offset = _create_flatgeobuf_xy_vector(builder, [geometry["coordinates"]])
+    else:
+        # Polygon or MultiLineString, the ends tell where each ring/line stops.
+        rings = geometry["coordinates"]
+        xy_offset = _create_flatgeobuf_xy_vector(builder, rings)
+        if len(rings) > 1:
+            ends = numpy.cumsum([len(ring) for ring in rings], dtype="<u4")
+            ends_offset = builder.CreateNumpyVector(ends)
+
+    builder.StartObject(8)  # table Geometry
+    builder.PrependUOffsetTRelativeSlot(0, ends_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(1, xy_offset, 0)
+    builder.PrependUint8Slot(6, FLATGEOBUF_GEOMETRY_TYPES[geometry_type.upper()], 0)
+    builder.PrependUOffsetTRelativeSlot(7, parts_offset, 0)
+    return builder.EndObject()
+
+
+def _create_flatgeobuf_xy_vector(builder, lines: list) -> int:
+    """Write all coordinates of one or more lines as a single flat x/y vector."""
+    xy = numpy.array([point[:2] for line in lines for point in line], "<f8")
+    return builder.CreateNumpyVector(xy.ravel())
+
+
+def _create_flatgeobuf_offset_vector(builder, offsets: list) -> int:
+    builder.StartVector(4, len(offsets), 4)
+    for offset in reversed(offsets):
+        builder.PrependUOffsetTRelative(offset)
+    return builder.EndVector()
+
+
+def _get_csv_row_getter(header: list):
+    """Build the function that flattens a serializer row into the CSV columns.
+    This gives the same result as the generic flattening of ``CSVStreamingRenderer``,
+    but the lookups are only determined once. Like :meth:`CSVRenderer._get_csv_header`
+    produces, the columns of sub-resources (e.g. ``cluster.id``) come after the other columns.
+    """
+    names = [name for name in header if "." not in name]
+    sub_paths = [name.split(".") for name in header if "." in name]
+
+    def _get_row(item: dict) -> list:
+        row = [item.get(name) for name in names]
+        row.extend(_get_sub_value(item, path) for path in sub_paths)
+
+        # The generic flattening writes the contents of a dict/list into separate columns,
+        # these values never appear in the column itself.
+        return [None if isinstance(value, (dict, list)) else value for value in row]
+
+    return _get_row
+
+
+def _get_sub_value(item: dict, path: list):
+    """Retrieve the value of a sub-resource field, e.g. ``item["cluster"]["id"]``."""
+    value = item
+    for name in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(name)
+    return value
+
+
+def _chunked_output(
+    stream, chunk_size=DEFAULT_CHUNK_SIZE, max_delay=DEFAULT_CHUNK_DELAY, write_exception=None
+):
     """Output in larger chunks to avoid many small writes or back-forth calls
     between the WSGI server write code and the original generator function.
     Inspired by django-gisserver logic which applies the same trick.
+
+    The buffer is flushed when it exceeds the ``chunk_size``, or when the data
+    has been waiting longer than ``max_delay`` seconds. The latter makes sure the
+    first bytes are sent early when a slow query only produces a few records at a time.
+    As the stream is only inspected when it produces data, a stalled stream can't be flushed.
     """
-    buffer = BytesIO()
+    buffer = []
     buffer_size = 0
+    deadline = None
     try:
         for row in stream:
-            buffer.write(row)
+            if not buffer and max_delay is not None:
+                deadline = time.monotonic() + max_delay
+
+            buffer.append(row)
             buffer_size += len(row)
 
-            if buffer_size > chunk_size:
-                yield buffer.getvalue()
-                buffer.seek(0)
-                buffer.truncate(0)
+            if buffer_size > chunk_size or (deadline is not None and time.monotonic() > deadline):
+                # Only join the collected parts once, instead of growing a buffer each write.
+                yield b"".join(buffer)
+                buffer.clear()
                 buffer_size = 0
         if buffer_size:
-            yield buffer.getvalue()
+            yield b"".join(buffer)
     except Exception as e:
         # Make sure some indication of an exception is also written to the stream.
         # Otherwise, the response is just cut off without any indication what happened.
@@ -11,13 +11,26 @@ Each time a bit of the response is generated, it's immediately written to the cl
 The rendered data also needs to be generated on consumption to have the full benefits of
 streaming. The :class:`~rest_framework_dso.serializers.DSOListSerializer` achieves this
 by returning the results as a Python generator instead of a pre-rendered list.
+
+As Django's ``GZipMiddleware`` can't be used on these responses,
+the :class:`StreamingResponse` can compress the stream itself.
+Each chunk is compressed and flushed as it arrives, so the stream is still written
+to the client while it's being generated. Brotli is used when that package is installed.
 """
+import zlib
 from http.client import responses
 from inspect import isgenerator
+from typing import Optional
 
 from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework.response import Response
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 
 class StreamingResponse(StreamingHttpResponse):
     """A reimplementation of the DRF 'Response' class
@@ -83,6 +96,23 @@ class StreamingResponse(StreamingHttpResponse):
 
         return streaming_response
 
+    def compress(self, accept_encoding: Optional[str]):
+        """Compress the streaming content with an encoding that the client accepts.
+        The ``accept_encoding`` is the value of the HTTP ``Accept-Encoding`` header.
+        """
+        patch_vary_headers(self, ("Accept-Encoding",))
+        if self.has_header("Content-Encoding"):
+            return
+
+        encoding = get_accepted_encoding(accept_encoding)
+        if encoding is None:
+            return
+
+        self.streaming_content = _compress_stream(
+            self.streaming_content, STREAM_COMPRESSORS[encoding]()
+        )
+        self["Content-Encoding"] = encoding
+
     def _read_rendered_content(self):
         """Wrap the retrieval of the stream data. This is applied to self.streaming_content."""
         # Calling the original DRF Response.rendered_content is sufficient, it
@@ -134,3 +164,92 @@ class StreamingResponse(StreamingHttpResponse):
                 del state[key]
         state["_closable_objects"] = []
         return state
+
+
+class GzipStreamCompressor:
+    """Incremental gzip compression of a stream."""
+
+    level = 6
+
+    def __init__(self):
+        # wbits=16+MAX_WBITS writes the gzip header and trailer.
+        self._compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk, and flush it so the client can decode it directly."""
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliStreamCompressor:
+    """Incremental brotli compression of a stream."""
+
+    quality = 4  # higher levels are too slow for on-the-fly compression.
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=self.quality)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk, and flush it so the client can decode it directly."""
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+#: The supported encodings, in order of preference.
+STREAM_COMPRESSORS = {"gzip": GzipStreamCompressor}
+if brotli is not None:
+    STREAM_COMPRESSORS = {"br": BrotliStreamCompressor, **STREAM_COMPRESSORS}
+
+
+def get_accepted_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Tell which supported encoding should be used for an HTTP ``Accept-Encoding`` value.
+    When the client gives multiple options, the highest "q" value wins,
+    and the preference of :data:`STREAM_COMPRESSORS` decides between equal values.
+    """
+    if not accept_encoding:
+        return None
+
+    qualities = {}
+    for value in accept_encoding.split(","):
+        coding, *params = value.lower().split(";")
+        qualities[coding.strip()] = _get_quality(params)
+
+    wildcard = qualities.get("*", 0.0)
+    best_quality, best_encoding = 0.0, None
+    for encoding in STREAM_COMPRESSORS:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best_quality, best_encoding = quality, encoding
+
+    return best_encoding
+
+
+def _get_quality(params: list) -> float:
+    """Parse the "q" value from the parameters of a header value."""
+    for param in params:
+        name, _, value = param.strip().partition("=")
+        if name == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _compress_stream(stream, compressor):
+    """Compress each chunk from the stream as it arrives."""
+    try:
+        for data in stream:
+            if data:
+                yield compressor.compress(data)
+    except Exception:
+        # Close the compressed stream, so the error message that the response
+        # wrote at the end can still be read by the client.
+        yield compressor.finish()
+        raise
+
+    yield compressor.finish()
@@ -18,20 +18,23 @@ but useful to implement DSO-style responses for other data sources (e.g. remote
 The model-serializers depend on the ORM logic, and support features like object embedding
 and constructing serializer fields based on the model field metadata.
 """
+import copy
 import inspect
 from collections import OrderedDict
-from typing import List, Optional, Union, cast
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple, Type, Union, cast
 
 from django.contrib.gis.db import models as gis_models
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
 from django.utils.functional import cached_property
+from lru import LRU
 from rest_framework import serializers
 from rest_framework.exceptions import ParseError, ValidationError
 from rest_framework.fields import URLField, empty
 from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
 from rest_framework_gis.fields import GeometryField
 
-from rest_framework_dso.crs import CRS
+from rest_framework_dso.crs import CRS, TRANSFORMED_SUFFIX
 from rest_framework_dso.embedding import (
     ChunkedQuerySetIterator,
     EmbeddedFieldMatch,
@@ -41,9 +44,25 @@ from rest_framework_dso.embedding import (
     get_serializer_lookups,
     parse_expand_scope,
 )
-from rest_framework_dso.fields import DSOGeometryField, LinksField, parse_request_fields
+from rest_framework_dso.fields import (
+    DSOGeometryField,
+    GeoJSONAnnotationField,
+    GeoJSONIdentifierField,
+    LinksField,
+    parse_request_fields,
+)
 from rest_framework_dso.serializer_helpers import ReturnGenerator, peek_iterable
 
+MAX_CACHED_FIELD_SETS = 1000
+
+# The fields per serializer class and field selection, see DSOSerializer.get_fields().
+_cached_fields = LRU(MAX_CACHED_FIELD_SETS)
+
+
+def clear_fields_cache():
+    """Remove all cached serializer fields (e.g. when the models are reloaded)."""
+    _cached_fields.clear()
+
 
 class ExpandMixin:
     """Handling ?_expand / ?_expandScope parameter.
@@ -218,21 +237,12 @@ class DSOModelListSerializer(DSOListSerializer):
 
         request = self.context["request"]
 
-        # Find the the best approach to iterate over the results.
-        if prefetch_lookups := self.get_prefetch_lookups():
-
-            # When there are related fields, avoid an N-query issue by prefetching.
-            # ChunkedQuerySetIterator makes sure the queryset is still read in partial chunks.
-            queryset_iterator = ChunkedQuerySetIterator(data.prefetch_related(*prefetch_lookups))
-        else:
-            queryset_iterator = data.iterator()
-
         # Find the desired output format
         if not request.accepted_renderer.supports_list_embeds:
             # When the output format needs a plain list (a non-JSON format), give it just that.
             # The generator syntax still tricks DRF into reading the source bit by bit,
             # without caching the whole queryset into memory.
-            items = (self.child.to_representation(item) for item in queryset_iterator)
+            items = self._get_items(data)
 
             # Make sure the first to_representation() is called early on. This makes sure
             # DSOModelSerializer.to_representation() can inspect the CRS, and define the
@@ -255,23 +265,42 @@ class DSOModelListSerializer(DSOListSerializer):
                     for expand_match in self.expanded_fields
                 }
 
-                # Wrap the main object inside an observer, which notifies all
-                # embedded sets about the retrieved objects. They prepare their
-                # data retrieval accordingly.
-                queryset_iterator = ObservableIterator(
-                    queryset_iterator,
-                    observers=[
-                        result_set.inspect_instance for result_set in embedded_fields.values()
-                    ],
-                )
-
             # The generator/peek logic avoids unnecessary memory usage (see details above).
-            items = (self.child.to_representation(item) for item in queryset_iterator)
+            items = self._get_items(
+                data,
+                observers=[result_set.inspect_instance for result_set in embedded_fields.values()],
+            )
             _, items = peek_iterable(items)
 
             # DSO always mandates a dict structure for JSON responses: {"objectname": [...]}
             return {self.results_field: items, **embedded_fields}
 
+    def _get_items(self, queryset: models.QuerySet, observers=None) -> Iterator[dict]:
+        """Generate the serialized objects, reading the queryset in the most efficient way."""
+        if deferred_fields := self.child.get_deferred_fields(queryset):
+            # Avoid reading the columns of fields that ?_fields excludes.
+            queryset = queryset.defer(*deferred_fields)
+
+        if prefetch_lookups := self.get_prefetch_lookups():
+            # When there are related fields, avoid an N-query issue by prefetching.
+            # ChunkedQuerySetIterator makes sure the queryset is still read in partial chunks.
+            queryset_iterator = ChunkedQuerySetIterator(
+                queryset.prefetch_related(*prefetch_lookups)
+            )
+        elif not observers and (converters := self.child.get_values_converters(queryset)):
+            # When all fields only need a database value, no model instances have to be created.
+            return self.child.values_to_representation(queryset, converters)
+        else:
+            queryset_iterator = queryset.iterator()
+
+        if observers:
+            # Wrap the main object inside an observer, which notifies all
+            # embedded sets about the retrieved objects. They prepare their
+            # data retrieval accordingly.
+            queryset_iterator = ObservableIterator(queryset_iterator, observers=observers)
+
+        return (self.child.to_representation(item) for item in queryset_iterator)
+
 
 class DSOSerializer(ExpandMixin, serializers.Serializer):
     """Basic non-model serializer logic.
@@ -358,10 +387,13 @@ class DSOSerializer(ExpandMixin, serializers.Serializer):
         self._fields_to_display = fields
 
     def get_fields(self):
+        """Build the fields, limited to the ``?_fields`` selection.
+
+        The outcome is the same for all requests with the same selection and inline embeds,
+        hence it's cached. As fields are bound to their serializer, the cached fields are copied.
+        """
         # .get() is needed to print serializer fields during debugging
         request = self.context.get("request")
-        fields = super().get_fields()
-
         if request is None:
             # request would be be None for get_schema_view(public=True),
             # any other situation could be the basis for an information leak, hence abort here.
@@ -369,6 +401,36 @@ class DSOSerializer(ExpandMixin, serializers.Serializer):
                 "Request object should be provided to serializer to apply security-restrictions"
             )
 
+        inline_embeds = self.get_inline_embeds()
+        cache_key = (
+            self.__class__,
+            tuple(self.fields_to_display or ()),
+            tuple(embed_match.name for embed_match in inline_embeds),
+        )
+        if (fields := _cached_fields.get(cache_key)) is None:
+            fields = _cached_fields[cache_key] = self._build_fields(inline_embeds)
+
+        return OrderedDict(
+            (field_name, copy.deepcopy(field)) for field_name, field in fields.items()
+        )
+
+    def get_inline_embeds(self) -> List[EmbeddedFieldMatch]:
+        """Tell which embedded objects are included as regular fields.
+
+        This happens when the output renderer needs this (e.g. CSV).
+        The getattr() is needed for the OpenAPIRenderer which lacks the supports_* attrs,
+        and for requests that didn't go through content negotiation.
+        """
+        renderer = getattr(self.context["request"], "accepted_renderer", None)
+        if getattr(renderer, "supports_inline_embeds", False):
+            return self.expanded_fields
+        else:
+            return []
+
+    def _build_fields(self, inline_embeds: List[EmbeddedFieldMatch]) -> OrderedDict:
+        """Create the fields for the requested selection and inline embeds."""
+        fields = super().get_fields()
+
         # Adjust the serializer based on the request,
         # remove fields if a subset is requested.
         if request_fields := self.fields_to_display:
@@ -381,17 +443,11 @@ class DSOSerializer(ExpandMixin, serializers.Serializer):
                 ]
             )
 
-        # Allow embedded objects to be included inline, if this is needed for the output renderer
-        # (e.g. CSV). To achieve this effect, the serializers are included as regular fields.
-        # The getattr() is needed for the OpenAPIRenderer which lacks the supports_* attrs.
-        if getattr(request.accepted_renderer, "supports_inline_embeds", False):
-            for embed_match in self.expanded_fields:
-                # Not using field.get_serialize() as the .bind() will be called by DRF here.
-                name = embed_match.name
-                source = embed_match.field.source if embed_match.field.source != name else None
-                fields[name] = embed_match.field.serializer_class(
-                    source=source, fields_to_expand=None
-                )
+        for embed_match in inline_embeds:
+            # Not using field.get_serialize() as the .bind() will be called by DRF here.
+            name = embed_match.name
+            source = embed_match.field.source if embed_match.field.source != name else None
+            fields[name] = embed_match.field.serializer_class(source=source, fields_to_expand=None)
 
         return fields
 
@@ -568,10 +624,167 @@ class DSOModelSerializer(DSOSerializer, serializers.HyperlinkedModelSerializer):
     #: Fetcher function for embedded objects, can be redefined by subclasses.
     id_based_fetcher = None
 
+    #: The serializer fields that only render the value of a model field,
+    #: so these can be rendered from a ``values_list()`` row.
+    values_field_types = (
+        serializers.BooleanField,
+        serializers.CharField,
+        serializers.ChoiceField,
+        serializers.DateField,
+        serializers.DateTimeField,
+        serializers.DecimalField,
+        serializers.FloatField,
+        serializers.IntegerField,
+        serializers.JSONField,
+        serializers.ReadOnlyField,
+        serializers.TimeField,
+        serializers.UUIDField,
+        GeometryField,
+        GeoJSONAnnotationField,
+    )
+
+    #: The method fields that only read the model metadata (not the values of the object).
+    #: Other method fields could read any model field, so ``?_fields`` won't defer columns.
+    metadata_method_fields = ()
+
     def _include_embedded(self):
         """Determines if the _embedded field must be generated."""
         return self.root is self or self.has_fields_to_expand_override()
 
+    def get_deferred_fields(self, queryset: models.QuerySet) -> List[str]:
+        """Tell which model fields don't have to be read, as the ``?_fields`` parameter omits them.
+        Relations, and the fields that the ``_links`` section reads, are always retrieved.
+        """
+        if not self.fields_to_display or (used_names := self._get_source_names()) is None:
+            return []
+
+        meta = queryset.model._meta
+        for name in used_names - set(queryset.query.annotations):
+            try:
+                meta.get_field(name)
+            except FieldDoesNotExist:
+                return []  # e.g. a property, which could read any field.
+
+        used_names |= _get_link_field_names(queryset.model)
+        used_names.update(embed_match.field.source for embed_match in self.expanded_fields)
+        return [
+            model_field.name
+            for model_field in meta.concrete_fields
+            if not model_field.is_relation
+            and not model_field.primary_key
+            and model_field.name not in used_names
+        ]
+
+    def _get_source_names(self) -> Optional[Set[str]]:
+        """Tell which attributes of the object the fields read, or ``None`` if that's unknown."""
+        names = set()
+        for field in self.fields.values():
+            if isinstance(field, serializers.SerializerMethodField):
+                if field.field_name not in self.metadata_method_fields:
+                    return None
+            elif field.source != "*":
+                names.add(field.source_attrs[0])
+            elif isinstance(field, DSOModelSerializer):
+                # e.g. the _links section, which reads the same object.
+                if (sub_names := field._get_source_names()) is None:
+                    return None
+                names |= sub_names
+            elif not isinstance(
+                field, (serializers.HyperlinkedIdentityField, GeoJSONIdentifierField)
+            ):
+                return None  # other fields for the whole object could read any field.
+
+        return names
+
+    def get_values_converters(
+        self, queryset: models.QuerySet
+    ) -> Optional[Dict[str, Tuple[str, Callable]]]:
+        """Tell which value each field reads from a ``values_list()`` row, and how it's rendered.
+        This returns ``None`` when a field needs the model instance (e.g. for URLs).
+        """
+        if self._has_custom_representation():
+            return None
+        elif self._include_embedded() and self.expanded_fields:
+            return None
+
+        converters = {}
+        for field in self._readable_fields:
+            if hasattr(field, "get_values_converter"):
+                converters[field.field_name] = field.get_values_converter()
+            elif (lookup := self._get_values_lookup(field, queryset)) is not None:
+                converters[field.field_name] = (lookup, field.to_representation)
+            else:
+                return None
+
+        return converters
+
+    def _has_custom_representation(self) -> bool:
+        """Tell whether a subclass alters the output of ``to_representation()``.
+        The ``values_list()`` rendering can't reproduce that, so it's not used then.
+        """
+        return type(self).to_representation is not DSOModelSerializer.to_representation
+
+    def _get_values_lookup(self, field: serializers.Field, queryset) -> Optional[str]:
+        """Tell which model field (or annotation) provides the value of the serializer field."""
+        if (
+            not isinstance(field, self.values_field_types)
+            or type(field).get_attribute is not serializers.Field.get_attribute
+            or len(field.source_attrs) != 1
+        ):
+            return None
+        elif field.source in queryset.query.annotations:
+            return field.source
+
+        try:
+            model_field = queryset.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None  # e.g. a property
+
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        elif field.source != model_field.attname:
+            return None  # a foreign key object, instead of the ID.
+
+        # Geometries that the database already transformed to the accepted CRS.
+        transformed = f"{field.source}{TRANSFORMED_SUFFIX}"
+        return transformed if transformed in queryset.query.annotations else field.source
+
+    def values_to_representation(
+        self, queryset: models.QuerySet, converters: Dict[str, Tuple[str, Callable]]
+    ) -> Iterator[dict]:
+        """Render the objects from ``values_list()`` rows, without creating model instances.
+        Django applies the same database converters, so the fields receive the same values.
+        """
+        names = list(converters)
+        lookups, to_representations = zip(*converters.values())
+        geometry_names = {field.field_name for field in self._geometry_fields}
+        geometry_positions = [i for i, name in enumerate(names) if name in geometry_names]
+
+        for row in queryset.values_list(*lookups).iterator():
+            if geometry_positions:
+                self._apply_values_crs([row[i] for i in geometry_positions])
+
+            # Same as DRF: None values are not passed to the field.
+            yield OrderedDict(
+                (name, None if value is None else to_representation(value))
+                for name, to_representation, value in zip(names, to_representations, row)
+            )
+
+    def _apply_values_crs(self, geo_values: list):
+        """The equivalent of the CRS handling in ``to_representation()`` for database values."""
+        request = self.context["request"]
+        accept_crs: CRS = request.accept_crs
+        if accept_crs is not None:
+            for geo_value in geo_values:
+                if geo_value is not None:
+                    accept_crs.apply_to(geo_value)
+            request.response_content_crs = accept_crs
+        elif request.response_content_crs is None:
+            # NOTE: just like _get_crs(), this uses the first geometry value.
+            srids = (geo_value.srid for geo_value in geo_values if geo_value is not None)
+            if (srid := next(srids, None)) is not None:
+                request.response_content_crs = CRS.from_srid(srid)
+
     def to_representation(self, instance):
         """Check whether the geofields need to be transformed."""
         ret = super().to_representation(instance)
@@ -631,3 +844,17 @@ class DSOModelSerializer(DSOSerializer, serializers.HyperlinkedModelSerializer):
             return prefetched_m2m.get(lookup, empty)
         else:
             return empty
+
+
+def _get_link_field_names(model: Type[models.Model]) -> Set[str]:
+    """Tell which model fields the ``_links`` section reads, besides the relations."""
+    names = set()
+    if display_field := getattr(model, "_display_field", None):
+        names.add(display_field)
+
+    if getattr(model, "is_temporal", None) is not None and model.is_temporal():
+        table_schema = model.table_schema()
+        names.update(table_schema.identifier)
+        names.add(table_schema.temporal.identifier)
+
+    return names
@@ -3,12 +3,15 @@ import sys
 from inspect import isgeneratorfunction
 from typing import Optional, Type, Union
 
-from django.http import HttpResponseNotFound, JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotFound, JsonResponse
+from django.utils.cache import get_conditional_response
 from rest_framework import status
 from rest_framework.exceptions import APIException, ErrorDetail, NotAcceptable, ValidationError
 from rest_framework.parsers import JSONParser
 from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.serializers import ListSerializer
 from rest_framework.utils import formatting
 from rest_framework.views import exception_handler as drf_exception_handler
@@ -234,6 +237,14 @@ def get_invalid_params(
     return result
 
 
+class _EarlyResponse(Exception):
+    """Stop processing the request, as the response is already known (e.g. HTTP 304)."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
 class AutoSelectPaginationClass:
     """An @classproperty for the pagination"""
 
@@ -259,6 +270,8 @@ class DSOViewMixin:
 
     This adds:
     * HTTP Accept-Crs and HTTP POST Content-Crs support.
+    * Conditional GET requests (``If-None-Match``), when the view implements ``get_etag()``.
+    * Compression of streaming responses, based on the HTTP Accept-Encoding header.
     * Default filter backends in the view for sorting and filtering.\
       The filtering logic is delegated to a ``filterset_class`` by django-filter.
 
@@ -287,6 +300,9 @@ class DSOViewMixin:
     #: Paginator class
     pagination_class = AutoSelectPaginationClass(default=DSOPageNumberPagination)
 
+    #: Whether streaming responses are compressed when the client accepts this.
+    compress_streaming_response = True
+
     def initial(self, request, *args, **kwargs):
         request.accept_crs = None
         request.response_content_crs = None
@@ -303,6 +319,41 @@ class DSOViewMixin:
         else:
             request.accept_crs = self._parse_accept_crs(accept_crs)
 
+        # Allow clients to revalidate their cached response before any query is executed.
+        response = self.get_conditional_response(request)
+        if response is not None:
+            raise _EarlyResponse(response)
+
+    def get_conditional_response(self, request) -> Optional[HttpResponse]:
+        """Return a response when the request doesn't have to be processed (e.g. HTTP 304)."""
+        request.response_etag = None
+        if request.method not in ("GET", "HEAD"):
+            return None
+
+        request.response_etag = self.get_etag(request)
+        if request.response_etag is None:
+            return None
+
+        return get_conditional_response(request, etag=request.response_etag)
+
+    def get_etag(self, request) -> Optional[str]:
+        """Tell what the ETag of the response will be, to support conditional requests.
+        This is disabled by default, as the value has to change whenever the data changes.
+        """
+        return None
+
+    def get_data_version(self, db_tables) -> Optional[str]:
+        """Tell which version of the data the tables have, so cached results
+        (e.g. the pagination count) can be invalidated. This is disabled by default.
+        """
+        return None
+
+    def handle_exception(self, exc):
+        """Return the early response (e.g. HTTP 304 Not Modified) for conditional requests."""
+        if isinstance(exc, _EarlyResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
     @property
     def table_schema(self) -> DatasetTableSchema:
         return self.model._table_schema
@@ -329,6 +380,20 @@ class DSOViewMixin:
             raise NotAcceptable(f"Chosen CRS is not supported: {accept_crs}")
         return accept_crs
 
+    def filter_queryset(self, queryset):
+        """Updated to allow the output format to optimize the queryset"""
+        queryset = super().filter_queryset(queryset)
+
+        if hasattr(self.request.accepted_renderer, "tune_queryset"):
+            queryset = self.request.accepted_renderer.tune_queryset(queryset, self.request)
+
+        # Let the database transform the geometries, when the Accept-Crs is known.
+        accept_crs = getattr(self.request, "accept_crs", None)
+        if accept_crs is not None and getattr(settings, "DSO_DATABASE_CRS_TRANSFORM", False):
+            queryset = crs.transform_queryset(queryset, accept_crs)
+
+        return queryset
+
     def get_serializer(self, *args, **kwargs):
         """Updated to allow extra modifications to the serializer"""
         serializer = super().get_serializer(*args, **kwargs)
@@ -347,19 +412,18 @@ class DSOViewMixin:
 
         Also restore streaming support if the output media uses generators.
         """
-        # The logic from initial() won't be executed if there is an early parser exception.
-        accept_crs = getattr(request, "accept_crs", None)
-        content_crs = getattr(request, "response_content_crs", None) or accept_crs
-        if content_crs is not None:
-            response["Content-Crs"] = str(content_crs)
-
+        self._set_response_headers(request, response)
         response = super().finalize_response(request, response, *args, **kwargs)
+        if not isinstance(response, Response):
+            return response  # e.g. HTTP 304 Not Modified, or a cached response
 
         # Workaround for DRF bug. When the response produces a generator, make sure the
         # Django middleware doesn't concat the stream. Unfortunately, it's not safe to
         # check what 'response.rendered_content' returns as that invokes the rendering.
         if isgeneratorfunction(response.accepted_renderer.render):
             response = StreamingResponse.from_response(response)
+            if self.compress_streaming_response:
+                response.compress(request.META.get("HTTP_ACCEPT_ENCODING"))
 
         if hasattr(response.accepted_renderer, "finalize_response"):
             renderer_context = {}
@@ -371,6 +435,18 @@ class DSOViewMixin:
 
         return response
 
+    def _set_response_headers(self, request, response):
+        """Set the Content-Crs and ETag headers."""
+        # The logic from initial() won't be executed if there is an early parser exception.
+        accept_crs = getattr(request, "accept_crs", None)
+        content_crs = getattr(request, "response_content_crs", None) or accept_crs
+        if content_crs is not None:
+            response["Content-Crs"] = str(content_crs)
+
+        etag = getattr(request, "response_etag", None)
+        if etag is not None and response.status_code in (200, 304):
+            response["ETag"] = etag
+
     def get_view_description(self, **kwargs):
         if self.action == "retrieve":
             return ""  # hide description for detail view
@@ -0,0 +1,131 @@
+"""Benchmark of the HAL-JSON renderer.
+
+The benchmarks only run when ``DSO_BENCHMARK`` is set, and print their results::
+
+    DSO_BENCHMARK=1 pytest -s tests/benchmarks/
+
+The current renderer is compared against :class:`PerKeyHALJSONRenderer`,
+which renders the data the way the renderer did before: recursing into every dict
+to encode each key and value separately, and yielding every list record on its own.
+"""
+import os
+import time
+
+import orjson
+import pytest
+
+from rest_framework_dso.renderers import HALJSONRenderer
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("DSO_BENCHMARK"), reason="Benchmarks only run when DSO_BENCHMARK is set"
+)
+
+NUM_ROWS = 50_000
+NUM_DETAILS = 5_000
+REPEAT = 5
+
+
+class PerKeyHALJSONRenderer(HALJSONRenderer):
+    """The previous rendering, for comparison."""
+
+    def _render_json(self, data, level=0):
+        if not data:
+            yield orjson.dumps(data)
+            return
+        elif isinstance(data, dict):
+            yield b"{"
+            sep = b"\n  "
+            for key, value in data.items():
+                yield b"%b%b:" % (sep, orjson.dumps(key))
+                yield from self._render_json(value, level=level + 1)
+                sep = b",\n  "
+            yield b"\n}"
+        elif hasattr(data, "__iter__") and not isinstance(data, str):
+            yield b"["
+            sep = b"\n  "
+            for item in data:
+                yield b"%b%b" % (sep, orjson.dumps(item))
+                sep = b",\n  "
+            yield b"\n]"
+        else:
+            yield orjson.dumps(data)
+
+        if not level:
+            yield b"\n"
+
+
+def _get_row(i: int) -> dict:
+    """A record like the dynamic API renders it."""
+    return {
+        "_links": {
+            "schema": "https://schemas.data.amsterdam.nl/datasets/afvalwegingen#containers",
+            "self": {
+                "href": f"http://testserver/v1/afvalwegingen/containers/{i}/",
+                "title": str(i),
+                "id": i,
+            },
+            "cluster": {"href": "http://testserver/v1/afvalwegingen/clusters/c1/", "id": "c1"},
+        },
+        "id": i,
+        "serienummer": f"SN-{i:08d}",
+        "eigenaarNaam": "Dienst Afvalbeheer",
+        "datumCreatie": "2021-01-03",
+        "geometry": {"type": "Point", "coordinates": [121389.0 + i, 487369.0]},
+    }
+
+
+def _get_list_data() -> dict:
+    return {
+        "_links": {"self": {"href": "http://testserver/v1/afvalwegingen/containers/"}},
+        "_embedded": {"containers": (_get_row(i) for i in range(NUM_ROWS))},
+        "page": {"number": 1, "size": NUM_ROWS},
+    }
+
+
+def _get_best_duration(render) -> float:
+    """Tell how long the fastest of a few runs took."""
+    durations = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        render()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def _render_list(renderer) -> bytes:
+    return b"".join(renderer.render(_get_list_data()))
+
+
+def _render_details(renderer, rows) -> list:
+    return [b"".join(renderer.render(row)) for row in rows]
+
+
+def test_hal_json_list_rows():
+    """Compare the number of list records per second."""
+    before = _get_best_duration(lambda: _render_list(PerKeyHALJSONRenderer()))
+    after = _get_best_duration(lambda: _render_list(HALJSONRenderer()))
+    print(
+        f"\nHAL-JSON list rows: {NUM_ROWS / before:,.0f} rows/sec before,"
+        f" {NUM_ROWS / after:,.0f} rows/sec after"
+    )
+
+    # Both produce the same data
+    assert orjson.loads(_render_list(HALJSONRenderer())) == orjson.loads(
+        _render_list(PerKeyHALJSONRenderer())
+    )
+
+
+def test_hal_json_detail_objects():
+    """Compare the number of detail objects per second."""
+    rows = [_get_row(i) for i in range(NUM_DETAILS)]
+    before = _get_best_duration(lambda: _render_details(PerKeyHALJSONRenderer(), rows))
+    after = _get_best_duration(lambda: _render_details(HALJSONRenderer(), rows))
+    print(
+        f"\nHAL-JSON detail objects: {NUM_DETAILS / before:,.0f} objects/sec before,"
+        f" {NUM_DETAILS / after:,.0f} objects/sec after"
+    )
+
+    # Both produce the same data
+    assert list(map(orjson.loads, _render_details(HALJSONRenderer(), rows))) == list(
+        map(orjson.loads, _render_details(PerKeyHALJSONRenderer(), rows))
+    )
@@ -0,0 +1,93 @@
+"""Benchmark of the URL templates of the hyperlinked fields.
+
+The benchmarks only run when ``DSO_BENCHMARK`` is set, and print their results::
+
+    DSO_BENCHMARK=1 pytest -s tests/benchmarks/
+
+The vestiging table is used, as every object has 3 links: the "self" link,
+and the "bezoekAdres" and "postAdres" relations. The serializer output with URL templates
+is compared against the same output where every URL is generated by ``reverse()``.
+"""
+import os
+import time
+from unittest import mock
+
+import pytest
+
+from dso_api.dynamic_api.serializers import serializer_factory
+from rest_framework_dso import fields
+from tests.utils import api_request_with_scopes, normalize_data, to_drf_request
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("DSO_BENCHMARK"), reason="Benchmarks only run when DSO_BENCHMARK is set"
+)
+
+NUM_OBJECTS = 2_000
+NUM_LINKS = 3
+REPEAT = 5
+
+
+def _serialize(VestigingSerializer, vestigingen, vestiging_schema) -> dict:
+    """Serialize the objects with a new request, so no URL templates are reused."""
+    drf_request = to_drf_request(api_request_with_scopes([]))
+    drf_request.dataset = vestiging_schema
+    serializer = VestigingSerializer(vestigingen, context={"request": drf_request}, many=True)
+    return normalize_data(serializer.data)
+
+
+def _get_best_duration(serialize) -> float:
+    """Tell how long the fastest of a few runs took."""
+    durations = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        serialize()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+@pytest.mark.django_db
+def test_url_templates_relations(
+    filled_router, vestiging_schema, vestiging_adres_model, vestiging_vestiging_model
+):
+    """Compare the number of generated URLs per second, with and without the templates."""
+    adressen = vestiging_adres_model.objects.bulk_create(
+        vestiging_adres_model(
+            id=i, plaats="Amsterdam", straat="Dam", nummer=i, postcode=f"{1000 + i % 9000}AA"
+        )
+        for i in range(1, 101)
+    )
+    vestiging_vestiging_model.objects.bulk_create(
+        vestiging_vestiging_model(
+            id=i,
+            naam=f"Vestiging {i}",
+            bezoek_adres=adressen[i % 100],
+            post_adres=adressen[(i + 1) % 100],
+        )
+        for i in range(1, NUM_OBJECTS + 1)
+    )
+
+    # The objects are fetched once as a list, so only the serializer is measured.
+    vestigingen = list(vestiging_vestiging_model.objects.order_by("id"))
+    VestigingSerializer = serializer_factory(vestiging_vestiging_model)
+
+    def serialize():
+        return _serialize(VestigingSerializer, vestigingen, vestiging_schema)
+
+    after = _get_best_duration(serialize)
+    with mock.patch.object(fields, "get_url_template", return_value=None):
+        before = _get_best_duration(serialize)
+        reversed_data = serialize()
+
+    num_urls = NUM_OBJECTS * NUM_LINKS
+    print(
+        f"\nURLs of {NUM_OBJECTS} vestigingen: {num_urls / before:,.0f} URLs/sec with reverse(),"
+        f" {num_urls / after:,.0f} URLs/sec with templates"
+    )
+
+    # Both produce the same data
+    data = serialize()
+    assert data == reversed_data
+    links = data[NUM_OBJECTS - 1]["_links"]
+    assert links["self"]["href"] == f"http://testserver/v1/vestiging/vestiging/{NUM_OBJECTS}/"
+    assert links["bezoekAdres"]["href"] == "http://testserver/v1/vestiging/adres/1/"
+    assert links["postAdres"]["href"] == "http://testserver/v1/vestiging/adres/2/"
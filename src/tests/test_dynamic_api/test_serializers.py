@@ -1,12 +1,16 @@
 from datetime import date
+from types import SimpleNamespace
+from unittest import mock
 
 import pytest
 from django.apps import apps
 from django.core.validators import EmailValidator, URLValidator
+from django.http import QueryDict
 from schematools.permissions import UserScopes
 from schematools.types import ProfileSchema
 
 from dso_api.dynamic_api.serializers import serializer_factory
+from rest_framework_dso import fields
 from rest_framework_dso.fields import EmbeddedField
 from rest_framework_dso.views import DSOViewMixin
 from tests.utils import (
@@ -788,6 +792,125 @@ class TestDynamicSerializer:
         fietspaaltjes = list(fietspaaltjes_serializer.data["fietspaaltjes"])  # consume generator
         assert fietspaaltjes[0]["area"] == "A", fietspaaltjes_serializer.data
 
+    @staticmethod
+    def test_field_plan_cache(
+        drf_request, fietspaaltjes_schema, fietspaaltjes_model, fietspaaltjes_data
+    ):
+        """Prove that the fields are cached per set of token scopes, including transforms."""
+        drf_request.dataset = fietspaaltjes_schema
+        drf_request.get_token_scopes = []
+        drf_request.user_scopes = UserScopes(
+            {},
+            request_scopes=[],
+            all_profiles=[
+                ProfileSchema.from_dict(
+                    {
+                        "name": "only_first",
+                        "datasets": {
+                            "fietspaaltjes": {
+                                "tables": {
+                                    "fietspaaltjes": {
+                                        "fields": {"area": "letters:1"},
+                                    }
+                                }
+                            }
+                        },
+                    }
+                ),
+            ],
+        )
+        patch_field_auth(fietspaaltjes_schema, "fietspaaltjes", "area", auth=["FOO/BAR"])
+
+        FietspaaltjesSerializer = serializer_factory(fietspaaltjes_model)
+        serializer1 = FietspaaltjesSerializer(fietspaaltjes_data, context={"request": drf_request})
+        serializer2 = FietspaaltjesSerializer(fietspaaltjes_data, context={"request": drf_request})
+        assert serializer1.data["area"] == "A"
+        assert serializer2.data["area"] == "A"
+        assert serializer1.fields["area"] is not serializer2.fields["area"]
+
+        # Other scopes have their own field plan.
+        drf_request.get_token_scopes = ["FOO/BAR"]
+        drf_request.user_scopes = UserScopes({}, request_scopes=["FOO/BAR"])
+        serializer3 = FietspaaltjesSerializer(fietspaaltjes_data, context={"request": drf_request})
+        assert serializer3.data["area"] == "Amsterdam-Centrum"
+
+    @staticmethod
+    def test_field_plan_cache_empty_param(
+        fietspaaltjes_schema, fietspaaltjes_model, fietspaaltjes_data
+    ):
+        """Prove that an empty parameter doesn't reuse the fields of a profile,
+        which is only activated by a filled-in mandatory filter.
+        """
+        patch_field_auth(fietspaaltjes_schema, "fietspaaltjes", "area", auth=["FOO/BAR"])
+        profile = ProfileSchema.from_dict(
+            {
+                "name": "filtered",
+                "datasets": {
+                    "fietspaaltjes": {
+                        "tables": {
+                            "fietspaaltjes": {
+                                "mandatoryFilterSets": [["id"]],
+                                "fields": {"area": "read"},
+                            }
+                        }
+                    }
+                },
+            }
+        )
+        FietspaaltjesSerializer = serializer_factory(fietspaaltjes_model)
+
+        def _get_field_names(query_string, view=None):
+            api_request = api_request_with_scopes([])
+            api_request.GET = QueryDict(query_string)
+            drf_request = to_drf_request(api_request)
+            drf_request.dataset = fietspaaltjes_schema
+            drf_request.get_token_scopes = []
+            drf_request.user_scopes = UserScopes(
+                drf_request.GET, request_scopes=[], all_profiles=[profile]
+            )
+            if view is not None:
+                # As done by the HasOAuth2Scopes permission for detail views.
+                drf_request.user_scopes.add_query_params(view.table_schema.identifier)
+            serializer = FietspaaltjesSerializer(
+                fietspaaltjes_data, context={"request": drf_request, "view": view}
+            )
+            return set(serializer.fields)
+
+        assert "area" in _get_field_names("id=1")
+        assert "area" not in _get_field_names("id=")
+        assert "area" not in _get_field_names("")
+
+        # The detail view matches the profile by its identifier.
+        detail_view = SimpleNamespace(
+            action="retrieve", table_schema=fietspaaltjes_model.table_schema()
+        )
+        assert "area" in _get_field_names("", view=detail_view)
+
+    @staticmethod
+    def test_url_templates(afval_schema, afval_container_model, afval_cluster_model):
+        """Prove that the URLs are generated from a template that is resolved once per view."""
+        drf_request = to_drf_request(api_request_with_scopes(["BAG/R"]))
+        drf_request.dataset = afval_schema
+        cluster = afval_cluster_model.objects.create(id="c1", status="open")
+        for i in range(1, 21):
+            afval_container_model.objects.create(id=i, cluster=cluster)
+
+        ContainerSerializer = serializer_factory(afval_container_model)
+        serializer = ContainerSerializer(
+            afval_container_model.objects.order_by("id"),
+            context={"request": drf_request},
+            many=True,
+        )
+
+        with mock.patch.object(fields, "reverse", wraps=fields.reverse) as reverse:
+            data = normalize_data(serializer.data)
+
+        # Only resolved for the "self" and "cluster" links, not for every container.
+        assert reverse.call_count == 2
+        links = data["containers"][19]["_links"]
+        assert links["self"]["href"] == "http://testserver/v1/afvalwegingen/containers/20/"
+        assert links["cluster"]["href"] == "http://testserver/v1/afvalwegingen/clusters/c1/"
+
     @staticmethod
     def test_download_url_field(
         drf_request, download_url_dataset, download_url_schema, filled_router
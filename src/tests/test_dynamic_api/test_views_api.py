@@ -6,7 +6,9 @@ import orjson
 import pytest
 from django.apps import apps
 from django.contrib.gis.geos import Point
+from django.core.management import call_command
 from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import NoReverseMatch, reverse
 from rest_framework.response import Response
 from schematools.contrib.django import models
@@ -149,6 +151,98 @@ class TestDSOViewMixin:
         assert response.has_header("Content-Crs"), dict(response.items())
         assert RD_NEW == CRS.from_string(response["Content-Crs"])
 
+    def test_conditional_get(self, api_client, afval_container, filled_router):
+        """Prove that an unchanged response is not sent again."""
+        url = reverse("dynamic_api:afvalwegingen-containers-list")
+        response = api_client.get(url)
+        assert response.status_code == 200, response.data
+        etag = response["ETag"]
+        assert etag.startswith('W/"')
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert not response.content
+
+        # Other formats have a different ETag
+        response = api_client.get(url, {"_format": "csv"}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_conditional_get_data_version(
+        self, api_client, afval_container, afval_adresloopafstand_model, filled_router
+    ):
+        """Prove that the ETag changes once the data of the read tables has a new version."""
+        url = reverse("dynamic_api:afvalwegingen-containers-list")
+        etag = api_client.get(url)["ETag"]
+
+        # Tables that the response doesn't read are ignored.
+        call_command("bump_data_version", afval_adresloopafstand_model._meta.db_table)
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        call_command("bump_data_version", afval_container._meta.db_table)
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_response_cache(self, api_client, afval_container, filled_router, settings):
+        """Prove that a repeated request is answered from the response cache."""
+        settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        settings.DSO_RESPONSE_CACHE_TIMEOUT = 60
+        url = reverse("dynamic_api:afvalwegingen-containers-list")
+        response = api_client.get(url, {"_pageSize": 10, "_format": "json"})
+        assert response.streaming
+        data = read_response_json(response)
+
+        # Same query, different ordering of the parameters
+        response = api_client.get(url, {"_format": "json", "_pageSize": 10})
+        assert not response.streaming
+        assert read_response_json(response) == data
+
+        # Another host receives its own URLs
+        response = api_client.get(url, {"_pageSize": 10, "_format": "json"}, HTTP_HOST="other")
+        assert response.streaming
+        assert "http://other/" in read_response(response)
+
+    def test_response_cache_browsable_api(
+        self, api_client, afval_container, filled_router, settings
+    ):
+        """Prove that HTML pages are not cached, as these contain the CSRF token."""
+        settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        settings.DSO_RESPONSE_CACHE_TIMEOUT = 60
+        url = reverse("dynamic_api:afvalwegingen-containers-list")
+        for _ in range(2):
+            response = api_client.get(url, HTTP_ACCEPT="text/html")
+            assert response.status_code == 200
+            assert response.streaming
+            read_response(response)
+
+    def test_count_cache(self, api_client, afval_container, filled_router, settings):
+        """Prove that the exact pagination count is reused by the next request."""
+        settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        settings.DSO_COUNT_CACHE_TIMEOUT = 60
+        url = reverse("dynamic_api:afvalwegingen-containers-list")
+        response = api_client.get(url, {"_count": "true"})
+        assert response.status_code == 200, response.data
+        assert response["X-Total-Count"] == "1"
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url, {"_count": "true"})
+            assert response["X-Total-Count"] == "1"
+            read_response_json(response)
+
+        assert not any("COUNT(*)" in query["sql"] for query in context.captured_queries)
+
+        # A new data version of the table invalidates the cached count.
+        call_command("bump_data_version", afval_container._meta.db_table)
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url, {"_count": "true"})
+            assert response["X-Total-Count"] == "1"
+            read_response_json(response)
+
+        assert any("COUNT(*)" in query["sql"] for query in context.captured_queries)
+
 
 # TODO: Make parametrized, too much repetion. JJM
 @pytest.mark.django_db
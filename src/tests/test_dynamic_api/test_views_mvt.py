@@ -168,3 +168,14 @@ def test_mvt_model_auth(api_client, geometry_auth_thing, fetch_auth_token, fille
 
     del content["default"]["features"][0]["properties"]["metadata"]
     assert mapbox_vector_tile.decode(response.content) == content
+
+
+@pytest.mark.django_db
+def test_mvt_conditional_get(api_client, afval_container, filled_router):
+    """Prove that tiles are not sent again when the data didn't change."""
+    url = "/v1/mvt/afvalwegingen/containers/1/0/0.pbf"
+    response = api_client.get(url)
+    assert response.status_code == 200
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
@@ -291,7 +291,7 @@ def test_openapi_json(api_client, afval_dataset, fietspaaltjes_dataset, filled_r
         "in": "query",
         "schema": {
             "type": "string",
-            "enum": ["csv", "geojson", "json"],
+            "enum": ["arrow", "csv", "flatgeobuf", "geojson", "json", "ndjson", "parquet"],
         },
     }
     assert "_sort" in afval_parameters, all_keys
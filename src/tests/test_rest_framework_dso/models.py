@@ -59,6 +59,24 @@ class Movie(models.Model, NonTemporalMixin):
         return self.name
 
 
+class Country(models.Model, NonTemporalMixin):
+    """Used to test FK relations that refer to another field than the primary key."""
+
+    code = models.CharField(max_length=2, unique=True)
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        app_label = "test_rest_framework_dso"
+
+
+class Studio(models.Model, NonTemporalMixin):
+    name = models.CharField(max_length=100)
+    country = models.ForeignKey(Country, to_field="code", null=True, on_delete=models.SET_NULL)
+
+    class Meta:
+        app_label = "test_rest_framework_dso"
+
+
 class Location(models.Model, NonTemporalMixin):
     geometry = gis_models.PointField(srid=RD_NEW.srid)
 
@@ -2,7 +2,7 @@
 from rest_framework_dso.fields import EmbeddedField, EmbeddedManyToManyField
 from rest_framework_dso.serializers import DSOModelSerializer
 
-from .models import Actor, Category, Location, Movie, MovieUser
+from .models import Actor, Category, Country, Location, Movie, MovieUser, Studio
 
 
 class MovieUserSerializer(DSOModelSerializer):
@@ -41,6 +41,20 @@ class MovieSerializer(DSOModelSerializer):
         fields = ["name", "category_id", "date_added"]
 
 
+class CountrySerializer(DSOModelSerializer):
+    class Meta:
+        model = Country
+        fields = ["code", "name"]
+
+
+class StudioSerializer(DSOModelSerializer):
+    country = EmbeddedField(CountrySerializer)
+
+    class Meta:
+        model = Studio
+        fields = ["name", "country_id"]
+
+
 class LocationSerializer(DSOModelSerializer):
     class Meta:
         model = Location
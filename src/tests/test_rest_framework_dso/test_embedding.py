@@ -5,16 +5,22 @@ The other embedding tests can be found under "test_serializers" and "test_views"
 from itertools import cycle
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework_dso.embedding import (
     ChunkedQuerySetIterator,
+    EmbeddedResultSet,
     ObservableIterator,
+    _shared_objects,
+    clear_shared_cache,
     get_all_embedded_field_names,
     group_dotted_names,
 )
+from tests.utils import normalize_data
 
-from .models import Category, Movie
-from .serializers import MovieSerializer
+from .models import Category, Country, Movie, MovieUser, Studio
+from .serializers import MovieSerializer, StudioSerializer
 
 
 def test_group_dotted_names():
@@ -52,6 +58,146 @@ def test_get_all_embedded_field_names():
     }
 
 
+@pytest.mark.django_db
+def test_embedded_result_set_batches(drf_request, django_assert_num_queries):
+    """Prove that the embedded objects are fetched once, in batches of unique IDs."""
+    categories = [Category.objects.create(pk=i, name=f"category{i}") for i in range(1, 4)]
+    movies = [Movie(pk=i, name=f"Movie {i}", category=categories[i % 3]) for i in range(9)]
+
+    embedded_field = MovieSerializer.category
+    embedded_serializer = embedded_field.get_serializer(
+        MovieSerializer(context={"request": drf_request})
+    )
+    result_set = EmbeddedResultSet(embedded_field, embedded_serializer, main_instances=movies)
+    result_set.id_batch_size = 2
+    assert list(result_set.id_list) == [1, 2, 3]
+
+    with django_assert_num_queries(2):
+        names = sorted(category["name"] for category in result_set)
+
+    assert names == ["category1", "category2", "category3"]
+
+
+@pytest.mark.django_db
+def test_embedded_result_set_array_param(drf_request):
+    """Prove that the embedded objects are queried with a single array parameter,
+    while the other ``__in`` lookups (e.g. of ``prefetch_related()``) are not affected.
+    """
+    categories = [Category.objects.create(pk=i, name=f"category{i}") for i in range(1, 4)]
+    movies = [
+        Movie.objects.create(name=f"Movie {i}", category=categories[i % 3]) for i in range(6)
+    ]
+
+    embedded_field = MovieSerializer.category
+    embedded_serializer = embedded_field.get_serializer(
+        MovieSerializer(context={"request": drf_request})
+    )
+    result_set = EmbeddedResultSet(embedded_field, embedded_serializer, main_instances=movies)
+    with CaptureQueriesContext(connection) as context:
+        names = sorted(category["name"] for category in result_set)
+
+    assert names == ["category1", "category2", "category3"]
+    assert len(context.captured_queries) == 1
+    assert " = ANY(" in context.captured_queries[0]["sql"]
+
+    with CaptureQueriesContext(connection) as context:
+        assert len(list(Movie.objects.prefetch_related("category"))) == 6
+
+    assert " IN (" in context.captured_queries[-1]["sql"]
+    assert " IN (" in str(Movie.objects.filter(pk__in=[1, 2]).query)
+
+
+@pytest.mark.django_db
+def test_embedded_result_set_shared_cache(drf_request, settings, django_assert_num_queries):
+    """Prove that objects of small lookup tables are cached between requests."""
+    settings.DSO_EMBED_CACHE_TABLES = [Category._meta.db_table]
+    categories = [Category.objects.create(pk=i, name=f"category{i}") for i in range(1, 4)]
+    embedded_field = MovieSerializer.category
+
+    def _get_names(movies):
+        embedded_serializer = embedded_field.get_serializer(
+            MovieSerializer(context={"request": drf_request})
+        )
+        result_set = EmbeddedResultSet(embedded_field, embedded_serializer, main_instances=movies)
+        return sorted(category["name"] for category in result_set)
+
+    clear_shared_cache()
+    try:
+        with django_assert_num_queries(1):
+            assert _get_names([Movie(name="Movie 1", category=categories[0])]) == ["category1"]
+
+        # Only the missing object is queried.
+        movies = [Movie(name=f"Movie {i}", category=categories[i % 2]) for i in range(4)]
+        with django_assert_num_queries(1):
+            assert _get_names(movies) == ["category1", "category2"]
+
+        with django_assert_num_queries(0):
+            assert _get_names(movies) == ["category1", "category2"]
+    finally:
+        clear_shared_cache()
+
+
+@pytest.mark.django_db
+def test_embedded_result_set_shared_cache_to_field(
+    drf_request, settings, django_assert_num_queries
+):
+    """Prove that the cached objects are found by the value the foreign key refers to."""
+    settings.DSO_EMBED_CACHE_TABLES = [Country._meta.db_table]
+    country = Country.objects.create(code="NL", name="Nederland")
+    studios = [Studio(name="Studio 1", country=country)]
+    embedded_field = StudioSerializer.country
+
+    def _get_names():
+        embedded_serializer = embedded_field.get_serializer(
+            StudioSerializer(context={"request": drf_request})
+        )
+        result_set = EmbeddedResultSet(embedded_field, embedded_serializer, main_instances=studios)
+        return [country["name"] for country in result_set]
+
+    clear_shared_cache()
+    try:
+        with django_assert_num_queries(1):
+            assert _get_names() == ["Nederland"]
+
+        assert (Country._meta.db_table, "NL") in _shared_objects
+        with django_assert_num_queries(0):
+            assert _get_names() == ["Nederland"]
+    finally:
+        clear_shared_cache()
+
+
+@pytest.mark.django_db
+def test_embedded_result_set_shared_cache_nested(drf_request, settings):
+    """Prove that nested embeds of cached objects are not stored in the shared cache."""
+    settings.DSO_EMBED_CACHE_TABLES = [Category._meta.db_table]
+    user = MovieUser.objects.create(name="user1")
+    category = Category.objects.create(name="category1", last_updated_by=user)
+    Movie.objects.create(name="Movie 1", category=category)
+
+    def _get_user_names():
+        serializer = MovieSerializer(
+            Movie.objects.all(),
+            many=True,
+            fields_to_expand=["category.last_updated_by"],
+            context={"request": drf_request},
+        )
+        data = normalize_data(serializer.data)
+        return [item["_embedded"]["last_updated_by"]["name"] for item in data["category"]]
+
+    clear_shared_cache()
+    try:
+        assert _get_user_names() == ["user1"]
+        shared_category = _shared_objects[(Category._meta.db_table, category.pk)]
+        assert shared_category._state.fields_cache == {}
+
+        # The category is read from the cache, the nested relation is still retrieved.
+        MovieUser.objects.filter(pk=user.pk).update(name="user2")
+        assert _get_user_names() == ["user2"]
+        assert shared_category._state.fields_cache == {}
+    finally:
+        clear_shared_cache()
+
+
 @pytest.mark.django_db
 class TestChunkedQuerySetIterator:
     """Test whether the queryset chunking works as advertised."""
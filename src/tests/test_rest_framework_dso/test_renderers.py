@@ -1,9 +1,92 @@
+import gzip
 import inspect
+import struct
+from io import BytesIO
 
+import orjson
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
 import pytest
+from django.contrib.gis.geos import GEOSGeometry, Point
+from flatbuffers import number_types
+from flatbuffers.table import Table
+from rest_framework import serializers
+from rest_framework_gis.fields import GeoJsonDict, GeometryField
 
-from rest_framework_dso.renderers import CSVRenderer, GeoJSONRenderer, HALJSONRenderer
-from rest_framework_dso.response import StreamingResponse
+from rest_framework_dso.fields import GeoJSONFragment
+from rest_framework_dso.renderers import (
+    ArrowRenderer,
+    BrowsableAPIRenderer,
+    CSVRenderer,
+    FlatGeobufRenderer,
+    GeoJSONRenderer,
+    HALJSONRenderer,
+    NDJSONRenderer,
+    ParquetRenderer,
+    _chunked_output,
+)
+from rest_framework_dso.response import StreamingResponse, get_accepted_encoding
+from rest_framework_dso.serializer_helpers import ReturnGenerator
+
+from .models import Location
+from .serializers import LocationSerializer
+
+
+def test_chunked_output():
+    """Prove that the output is flushed on either the size or the time threshold."""
+    parts = [b"foo", b"bar", b"baz"]
+    assert list(_chunked_output(iter(parts), chunk_size=4, max_delay=None)) == [
+        b"foobar",
+        b"baz",
+    ]
+    assert list(_chunked_output(iter(parts), chunk_size=100, max_delay=None)) == [b"foobarbaz"]
+
+    # A deadline that is immediately passed flushes once the next part arrives.
+    assert list(_chunked_output(iter(parts), chunk_size=100, max_delay=-1)) == parts
+
+
+def test_browsable_content_urlize():
+    """Prove that URLs which cross a chunk boundary are converted as a whole."""
+    content = (part for part in [b'{"href": "http://example', b".com/\xc3", b'\xa9"}\n'])
+    html = b"".join(BrowsableAPIRenderer()._render_content(content)).decode()
+    assert html == (
+        '{&quot;href&quot;: &quot;<a href="http://example.com/%C3%A9" rel="nofollow">'
+        "http://example.com/\u00e9</a>&quot;}\n"
+    )
+
+
+@pytest.mark.parametrize(
+    ["accept_encoding", "expected"],
+    [
+        (None, None),
+        ("identity", None),
+        ("gzip, deflate", "gzip"),
+        ("gzip;q=0", None),
+        ("br;q=0, *;q=0.5", "gzip"),
+    ],
+)
+def test_get_accepted_encoding(accept_encoding, expected):
+    """Prove that the Accept-Encoding header is properly parsed."""
+    assert get_accepted_encoding(accept_encoding) == expected
+
+
+def test_streaming_compression():
+    """Prove that the streaming response is compressed as it's being read."""
+    response = StreamingResponse(data=({"foo": str(i)} for i in range(3)))
+    response.accepted_renderer = HALJSONRenderer()
+    response.accepted_media_type = response.accepted_renderer.media_type
+    response.renderer_context = {}
+    response.accepted_renderer.chunk_size = 1
+    response.compress("gzip, deflate")
+
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Vary"] == "Accept-Encoding"
+    blocks = list(response)
+    assert len(blocks) > 2  # each chunk is flushed separately
+    assert gzip.decompress(b"".join(blocks)) == (
+        b'[\n  {"foo":"0"},\n  {"foo":"1"},\n  {"foo":"2"}\n]\n'
+    )
 
 
 class TestRenderer:
@@ -26,6 +109,162 @@ class TestRenderer:
         data = b"".join(output)
         assert data == b"foo,bar\r\n1,2\r\n3,4\r\n"
 
+    def test_csv_rendering_serializer(self):
+        """Prove that rows are flattened according to the serializer fields."""
+
+        class SubSerializer(serializers.Serializer):
+            id = serializers.IntegerField()
+            name = serializers.CharField()
+
+        class RowSerializer(serializers.Serializer):
+            id = serializers.IntegerField()
+            tags = serializers.ListField()
+            sub = SubSerializer(allow_null=True)
+
+        rows = [
+            {"id": 1, "tags": ["a"], "sub": {"id": 2, "name": 'with "quotes"'}},
+            {"id": 3, "tags": [], "sub": None},
+        ]
+        data = ReturnGenerator(iter(rows), serializer=RowSerializer(many=True))
+        output = CSVRenderer().render(data)
+
+        # Lists are not written, missing sub-resources give empty columns.
+        data = b"".join(output)
+        assert data == b'Id,Tags,Sub.Id,Sub.Name\r\n1,,2,"with ""quotes"""\r\n3,,,\r\n'
+
+    def test_hal_json_rendering(self):
+        """Prove that the HAL envelope is written around the streamed records."""
+        renderer = HALJSONRenderer()
+        renderer.items_per_write = 2
+        output = renderer.render(
+            data={
+                "_links": {"self": {"href": "http://testserver/v1/movies"}},
+                "_embedded": {"movie": ({"name": f"Movie {i}"} for i in range(3))},
+                "page": {"number": 1},
+            },
+        )
+
+        assert inspect.isgenerator(output)
+        data = b"".join(output)
+        assert data == (
+            b'{\n  "_links":{"self":{"href":"http://testserver/v1/movies"}},'
+            b'\n  "_embedded":{\n  "movie":[\n  {"name":"Movie 0"},'
+            b'\n  {"name":"Movie 1"},\n  {"name":"Movie 2"}\n]\n}'
+            b',\n  "page":{"number":1}\n}\n'
+        )
+
+    def test_ndjson_rendering(self):
+        """Prove that each object is written on a separate line."""
+        renderer = NDJSONRenderer()
+        output = renderer.render(data=({"foo": str(i)} for i in range(3)))
+
+        assert inspect.isgenerator(output)
+        data = b"".join(output)
+        assert data == b'{"foo":"0"}\n{"foo":"1"}\n{"foo":"2"}\n'
+
+    def test_arrow_rendering(self):
+        """Prove that the objects are written as Arrow record batches."""
+        renderer = ArrowRenderer()
+        renderer.batch_size = 2
+        output = renderer.render(data=({"id": i, "name": f"Movie {i}"} for i in range(3)))
+
+        assert inspect.isgenerator(output)
+        reader = pyarrow.ipc.open_stream(b"".join(output))
+        batches = list(reader)
+        assert len(batches) == 2
+        assert reader.schema.types == [pyarrow.int64(), pyarrow.string()]
+        assert pyarrow.Table.from_batches(batches).to_pydict() == {
+            "id": [0, 1, 2],
+            "name": ["Movie 0", "Movie 1", "Movie 2"],
+        }
+
+    def test_arrow_rendering_geometry(self):
+        """Prove that geometries of other serializer fields are written as EWKB too."""
+
+        class GeometrySerializer(serializers.Serializer):
+            geometry = GeometryField()
+
+        point = Point(4.9, 52.3, srid=4326)
+        data = ReturnGenerator(
+            iter([{"geometry": point}, {"geometry": GeoJsonDict(orjson.loads(point.geojson))}]),
+            serializer=GeometrySerializer(),
+        )
+        output = ArrowRenderer().render(data=data)
+
+        table = pyarrow.ipc.open_stream(b"".join(output)).read_all()
+        assert table.schema.types == [pyarrow.binary()]
+        geometries = [GEOSGeometry(memoryview(value)) for value in table["geometry"].to_pylist()]
+        assert [geometry.coords for geometry in geometries] == [(4.9, 52.3), (4.9, 52.3)]
+        assert geometries[0].srid == 4326
+
+    def test_parquet_rendering(self):
+        """Prove that the objects are written as Parquet file, with a row group per batch."""
+        renderer = ParquetRenderer()
+        renderer.batch_size = 2
+        output = renderer.render(data=({"id": i, "name": f"Movie {i}"} for i in range(3)))
+
+        parquet_file = pyarrow.parquet.ParquetFile(BytesIO(b"".join(output)))
+        assert parquet_file.num_row_groups == 2
+        assert parquet_file.read().to_pydict() == {
+            "id": [0, 1, 2],
+            "name": ["Movie 0", "Movie 1", "Movie 2"],
+        }
+
+    def test_geojson_fragment_rendering(self):
+        """Prove that geometries which are encoded by the database are written as-is."""
+        renderer = GeoJSONRenderer()
+        geometry = GeoJSONFragment(b'{"type":"Point","coordinates":[4.9,52.3]}')
+        output = renderer.render(data=[{"name": "foo", "geometry": geometry}])
+
+        data = b"".join(output)
+        assert data == (
+            b'{"type":"FeatureCollection",\n  "features": [\n    {"type":"Feature",'
+            b'"geometry":{"type":"Point","coordinates":[4.9,52.3]},"properties":{"name":"foo"}}'
+            b'\n  ],\n"_links":[]}\n'
+        )
+
+    def test_flatgeobuf_rendering(self):
+        """Prove that the header and each feature are written as size-prefixed records."""
+        renderer = FlatGeobufRenderer()
+        geometry = GeoJsonDict({"type": "Point", "coordinates": [4.9, 52.3]})
+        output = renderer.render(data=({"name": f"Movie {i}", "geo": geometry} for i in range(3)))
+
+        assert inspect.isgenerator(output)
+        data = b"".join(output)
+        assert data[:8] == b"fgb\x03fgb\x00"
+
+        tables = []
+        pos = 8
+        while pos < len(data):
+            table, pos = _read_flatbuffers_record(data, pos)
+            tables.append(table)
+
+        assert pos == len(data)
+        header, *features = tables
+        assert len(features) == 3
+
+        # The features are streamed, so the header leaves the count as unknown (0).
+        # Without a serializer, the geometry type is also unknown.
+        assert _get_flatbuffers_scalar(header, 8, number_types.Uint64Flags) == 0
+        assert _get_flatbuffers_scalar(header, 2, number_types.Uint8Flags) == 0
+        columns = _get_flatbuffers_tables(header, 7)
+        assert [
+            (
+                _get_flatbuffers_string(column, 0),
+                _get_flatbuffers_scalar(column, 1, number_types.Uint8Flags),
+            )
+            for column in columns
+        ] == [(b"name", 11)]
+
+        # Parse one feature back
+        feature = features[1]
+        geometry = _get_flatbuffers_table(feature, 0)
+        assert _get_flatbuffers_scalar(geometry, 6, number_types.Uint8Flags) == 1  # Point
+        xy = _get_flatbuffers_vector(geometry, 1, number_types.Float64Flags)
+        assert xy.tolist() == [4.9, 52.3]
+        properties = _get_flatbuffers_vector(feature, 1, number_types.Uint8Flags)
+        assert properties.tobytes() == struct.pack("<HI", 0, 7) + b"Movie 1"
+
     RENDERERS = {
         "csv": (
             CSVRenderer,
@@ -35,6 +274,11 @@ class TestRenderer:
             HALJSONRenderer,
             [b'[\n  {"foo":"1","bar":"2"}', b"/* Aborted by RuntimeError during rendering! */\n"],
         ),
+        "ndjson": (
+            # The whole batch of objects is lost, only the error message is written.
+            NDJSONRenderer,
+            [b"\nAborted by RuntimeError during rendering!\n"],
+        ),
         "geojson": (
             GeoJSONRenderer,
             [
@@ -77,3 +321,68 @@ class TestRenderer:
 
         # The first part of the response should be received.
         assert blocks == expected_data
+
+
+def _read_flatbuffers_record(data: bytes, pos: int):
+    """Read a size-prefixed flatbuffers table, return it with the position of the next one."""
+    size = struct.unpack_from("<I", data, pos)[0]
+    buf = bytearray(data[pos + 4 : pos + 4 + size])
+    return Table(buf, struct.unpack_from("<I", buf, 0)[0]), pos + 4 + size
+
+
+def _get_flatbuffers_scalar(table: Table, field_index: int, flags):
+    return table.GetSlot(4 + 2 * field_index, 0, flags)
+
+
+def _get_flatbuffers_string(table: Table, field_index: int) -> bytes:
+    return table.String(table.Pos + table.Offset(4 + 2 * field_index))
+
+
+def _get_flatbuffers_vector(table: Table, field_index: int, flags):
+    return table.GetVectorAsNumpy(flags, table.Offset(4 + 2 * field_index))
+
+
+def _get_flatbuffers_table(table: Table, field_index: int) -> Table:
+    return Table(table.Bytes, table.Indirect(table.Pos + table.Offset(4 + 2 * field_index)))
+
+
+def _get_flatbuffers_tables(table: Table, field_index: int) -> list:
+    offset = table.Offset(4 + 2 * field_index)
+    start = table.Vector(offset)
+    return [
+        Table(table.Bytes, table.Indirect(start + 4 * i)) for i in range(table.VectorLen(offset))
+    ]
+
+
+@pytest.mark.django_db
+def test_geojson_database_encoding(drf_request, location, settings, django_assert_num_queries):
+    """Prove that only the geometries which the database encodes are deferred.
+    A geometry field with a permission-based transformation still reads the model field,
+    which should not cause an extra query per object.
+    """
+    settings.DSO_GEOJSON_DATABASE_ENCODING = True
+    renderer = GeoJSONRenderer()
+    drf_request.accepted_renderer = renderer
+    queryset = renderer.tune_queryset(Location.objects.all(), drf_request)
+
+    # A transformed field keeps the original geometry, so the column is not deferred.
+    serializer = LocationSerializer(queryset, many=True, context={"request": drf_request})
+    field = serializer.child.fields["geometry"]
+    field.to_representation = lambda value, original=field.to_representation: original(value)
+    renderer.tune_serializer(serializer.child)
+    assert serializer.child.fields["geometry"] is field
+    assert serializer.instance.query.deferred_loading == (frozenset(), True)
+
+    with django_assert_num_queries(1):
+        data = list(serializer.data)
+    assert data[0]["geometry"]["coordinates"] == [10.0, 10.0]
+
+    # A plain geometry field is read from the annotation, so the column is deferred.
+    serializer = LocationSerializer(queryset, many=True, context={"request": drf_request})
+    renderer.tune_serializer(serializer.child)
+    assert serializer.instance.query.deferred_loading == (frozenset({"geometry"}), True)
+
+    with django_assert_num_queries(1):
+        data = list(serializer.data)
+    assert isinstance(data[0]["geometry"], GeoJSONFragment)
+    assert orjson.loads(data[0]["geometry"])["coordinates"] == [10, 10]
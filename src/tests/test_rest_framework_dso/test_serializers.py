@@ -1,14 +1,16 @@
+from datetime import datetime, timezone
+
 import pytest
 from django.db import connection
 from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
 
-from rest_framework_dso.crs import RD_NEW, WGS84
+from rest_framework_dso.crs import RD_NEW, WGS84, transform_queryset
 from rest_framework_dso.pagination import DSOPageNumberPagination
 from rest_framework_dso.renderers import HALJSONRenderer
 from tests.utils import normalize_data, read_response_json
 
-from .models import Movie
+from .models import Location, Movie
 from .serializers import LocationSerializer, MovieSerializer
 
 
@@ -242,6 +244,18 @@ def test_fields_limit_mixed(api_rf, movie):
     assert "not possible to combine" in str(exec_info.value)
 
 
+def test_fields_cache(drf_request):
+    """Prove that the fields are cached per field selection, and copied for each serializer."""
+    serializer1 = MovieSerializer(context={"request": drf_request})
+    serializer2 = MovieSerializer(context={"request": drf_request})
+    assert list(serializer1.fields) == ["name", "category_id", "date_added"]
+    assert list(serializer2.fields) == ["name", "category_id", "date_added"]
+    assert serializer1.fields["name"] is not serializer2.fields["name"]
+
+    serializer3 = MovieSerializer(context={"request": drf_request}, fields_to_display=["name"])
+    assert list(serializer3.fields) == ["name"]
+
+
 @pytest.mark.django_db
 def test_location(drf_request, location):
     """Prove that the serializer recorgnizes crs"""
@@ -283,3 +297,74 @@ def test_location_transform(drf_request, location):
 
     # Serializer assigned 'response_content_crs' (used accept_crs)
     assert drf_request.response_content_crs == WGS84
+
+
+@pytest.mark.django_db
+def test_location_database_transform(drf_request, location):
+    """Prove that the database can transform the geometries to the requested crs."""
+    drf_request.accept_crs = WGS84
+    queryset = transform_queryset(Location.objects.all(), WGS84)
+    instance = queryset.get()
+    assert instance.geometry.srid == 4326
+    assert instance.get_deferred_fields() == set()
+
+    serializer = LocationSerializer(queryset, many=True, context={"request": drf_request})
+    lookup, _ = serializer.child.get_values_converters(queryset)["geometry"]
+    assert lookup == "geometry_transformed"
+    data = normalize_data(serializer.data)
+
+    rounder = lambda p: [round(c, 6) for c in p]
+    assert rounder(data["location"][0]["geometry"]["coordinates"]) == [3.313688, 47.974858]
+    assert drf_request.response_content_crs == WGS84
+
+
+@pytest.mark.django_db
+def test_serializer_many_values(drf_request, movie, django_assert_num_queries):
+    """Prove that objects without relational fields are rendered from values_list() rows."""
+    movie.date_added = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    movie.save()
+    serializer = MovieSerializer(Movie.objects.all(), many=True, context={"request": drf_request})
+    assert serializer.child.get_values_converters(Movie.objects.all()) == {
+        "name": ("name", serializer.child.fields["name"].to_representation),
+        "category_id": ("category_id", serializer.child.fields["category_id"].to_representation),
+        "date_added": ("date_added", serializer.child.fields["date_added"].to_representation),
+    }
+
+    with django_assert_num_queries(1):
+        data = normalize_data(serializer.data)
+
+    assert data == {"movie": [normalize_data(serializer.child.to_representation(movie))]}
+
+
+@pytest.mark.django_db
+def test_serializer_many_custom_representation(drf_request, movie):
+    """Prove that an overwritten to_representation() is still called for each object."""
+
+    class CustomMovieSerializer(MovieSerializer):
+        def to_representation(self, instance):
+            data = super().to_representation(instance)
+            data["name"] = data["name"].upper()
+            return data
+
+    serializer = CustomMovieSerializer(
+        Movie.objects.all(), many=True, context={"request": drf_request}
+    )
+    assert serializer.child.get_values_converters(Movie.objects.all()) is None
+
+    data = normalize_data(serializer.data)
+    assert data["movie"][0]["name"] == "FOO123"
+
+
+@pytest.mark.django_db
+def test_location_many_values_transform(drf_request, location):
+    """Prove that the values_list() rows are also transformed to the requested crs."""
+    drf_request.accept_crs = WGS84
+    serializer = LocationSerializer(
+        Location.objects.all(), many=True, context={"request": drf_request}
+    )
+    assert serializer.child.get_values_converters(Location.objects.all()) is not None
+    data = normalize_data(serializer.data)
+
+    rounder = lambda p: [round(c, 6) for c in p]
+    assert rounder(data["location"][0]["geometry"]["coordinates"]) == [3.313688, 47.974858]
+    assert drf_request.response_content_crs == WGS84
@@ -1,8 +1,12 @@
+import base64
 import json
 from datetime import datetime
 from html import unescape
+from threading import Thread
 
 import pytest
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
 from django.urls import path
 from django.utils.html import strip_tags
 from rest_framework import generics
@@ -10,9 +14,17 @@ from rest_framework.exceptions import ErrorDetail, ValidationError
 
 from rest_framework_dso import views
 from rest_framework_dso.filters import DSOFilterSet
+from rest_framework_dso.pagination import get_query_tables
+from rest_framework_dso.paginator import (
+    COUNT_ESTIMATE,
+    DSOPaginator,
+    _count_queryset,
+    get_estimated_count,
+)
+from rest_framework_dso.renderers import BrowsableAPIRenderer
 from tests.utils import read_response, read_response_json
 
-from .models import Movie
+from .models import Category, Movie, MovieUser
 from .serializers import MovieSerializer
 
 
@@ -211,6 +223,41 @@ class TestExpand:
         }
         assert response["Content-Type"] == "application/hal+json"
 
+    @staticmethod
+    def test_list_expand_nested_queries(api_client):
+        """Prove that nested embeds are fetched per nesting level, not per embedded object."""
+
+        def _create_movies(names):
+            for name in names:
+                Movie.objects.create(
+                    name=name,
+                    category=Category.objects.create(
+                        name=f"{name}_category",
+                        last_updated_by=MovieUser.objects.create(name=f"{name}_user"),
+                    ),
+                )
+
+        def _get_movies():
+            with CaptureQueriesContext(connection) as context:
+                response = api_client.get(
+                    "/v1/movies", data={"_expandScope": "category.last_updated_by"}
+                )
+                data = read_response_json(response)
+            assert response.status_code == 200, data
+            return data, len(context.captured_queries)
+
+        _create_movies(["a", "b"])
+        _, num_queries = _get_movies()
+
+        _create_movies(["c", "d", "e", "f"])
+        data, num_queries2 = _get_movies()
+
+        assert num_queries2 == num_queries
+        assert sorted(
+            category["_embedded"]["last_updated_by"]["name"]
+            for category in data["_embedded"]["category"]
+        ) == ["a_user", "b_user", "c_user", "d_user", "e_user", "f_user"]
+
     @pytest.mark.parametrize(
         "params",
         [
@@ -310,6 +357,20 @@ class TestExpand:
             "page": {"number": 1, "size": 20, "totalElements": 1, "totalPages": 1},
         }
 
+    def test_list_preview_api(self, api_client, category, monkeypatch):
+        """Prove that the browsable API only renders the first records of a listing."""
+        monkeypatch.setattr(BrowsableAPIRenderer, "preview_size", 2)
+        for i in range(3):
+            Movie.objects.create(name=f"movie{i}", category=category)
+
+        response = api_client.get("/v1/movies", HTTP_ACCEPT="text/html")
+        assert response["content-type"] == "text/html; charset=utf-8"
+        html = read_response(response)
+
+        assert "movie1" in html
+        assert "movie2" not in html
+        assert 'see <a href="http://testserver/v1/movies?_format=json"' in html
+
 
 @pytest.mark.django_db
 class TestListFilters:
@@ -435,6 +496,187 @@ class TestListOrdering:
         }
 
 
+@pytest.mark.django_db
+class TestListPagination:
+    """Prove that the pagination works as expected."""
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        ["params", "expected"],
+        [
+            ({}, ["movie0", "movie1", "movie2", "movie3", "movie4"]),
+            ({"_sort": "-name"}, ["movie4", "movie3", "movie2", "movie1", "movie0"]),
+            ({"_sort": "date_added,name"}, ["movie3", "movie1", "movie0", "movie2", "movie4"]),
+        ],
+    )
+    def test_list_cursor(api_client, params, expected):
+        """Prove that ?_cursor=... walks through all pages using the sort ordering."""
+        for i in range(5):
+            # The NULL values are sorted last by PostgreSQL.
+            date_added = datetime(2021, 1, 5 - i) if i % 2 else None
+            Movie.objects.create(name=f"movie{i}", date_added=date_added)
+
+        names = []
+        url = "/v1/movies"
+        params = {**params, "_pageSize": 2, "_cursor": ""}
+        while url:
+            response = api_client.get(url, data=params)
+            data = read_response_json(response)
+            assert response.status_code == 200, data
+            assert data["page"] == {"size": 2}
+
+            names.extend(movie["name"] for movie in data["_embedded"]["movie"])
+            url = data["_links"].get("next", {}).get("href")
+            params = None  # part of the next link
+
+        assert names == expected
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        ["params", "cursor"],
+        [
+            ({}, "not-base64!"),
+            ({}, "{}"),
+            ({}, "1"),
+            ({}, '"x"'),
+            ({}, '["movie0"]'),
+            ({}, '[["movie0"], 1]'),
+            ({}, '[{"name": "movie0"}, 1]'),
+            ({"_sort": "date_added,name"}, '["not a date", "movie0", 1]'),
+        ],
+    )
+    def test_list_cursor_invalid(api_client, params, cursor):
+        """Prove that a malformed cursor gives a validation error."""
+        Movie.objects.create(name="movie0")
+        if cursor != "not-base64!":
+            cursor = base64.urlsafe_b64encode(cursor.encode()).decode()
+
+        api_client.raise_request_exception = False
+        response = api_client.get("/v1/movies", data={**params, "_cursor": cursor})
+        data = read_response_json(response)
+        assert response.status_code == 400, data
+        assert data["x-validation-errors"] == ["Invalid cursor value."]
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        ["params", "expected_page", "expected_total"],
+        [
+            ({}, {"number": 1, "size": 2, "totalElements": 3, "totalPages": 2}, "3"),
+            (
+                {"_count": "true"},
+                {"number": 1, "size": 2, "totalElements": 3, "totalPages": 2},
+                "3",
+            ),
+            ({"_count": "false"}, {"number": 1, "size": 2}, None),
+        ],
+    )
+    def test_list_count(api_client, params, expected_page, expected_total):
+        """Prove that small results are counted, and ?_count=false skips the count."""
+        for i in range(3):
+            Movie.objects.create(name=f"movie{i}")
+
+        response = api_client.get("/v1/movies", data={**params, "_pageSize": 2})
+        data = read_response_json(response)
+        assert response.status_code == 200, data
+        assert data["page"] == expected_page
+        assert response.get("X-Total-Count") == expected_total
+        assert data["_links"]["next"]["href"].endswith("page=2")
+
+        # The next link is only given when there are more results.
+        response = api_client.get(data["_links"]["next"]["href"])
+        data = read_response_json(response)
+        assert response.status_code == 200, data
+        assert [movie["name"] for movie in data["_embedded"]["movie"]] == ["movie2"]
+        assert "next" not in data["_links"]
+
+    @staticmethod
+    def test_list_count_estimate(monkeypatch):
+        """Prove that large results use the estimate of the query planner."""
+        for i in range(3):
+            Movie.objects.create(name=f"movie{i}")
+
+        monkeypatch.setattr(DSOPaginator, "estimate_threshold", 0)
+        queryset = Movie.objects.filter(name__startswith="movie")
+        paginator = DSOPaginator(queryset, 2, count_mode=COUNT_ESTIMATE)
+        assert paginator.count == get_estimated_count(queryset)
+        assert not paginator.count_is_exact
+
+        # Pages beyond the estimate are still reachable.
+        page = paginator.page(paginator.num_pages + 1)
+        assert not page.has_next()
+
+    @staticmethod
+    def test_list_count_estimate_marker(api_client, monkeypatch):
+        """Prove that an estimated count is not presented as exact."""
+        for i in range(3):
+            Movie.objects.create(name=f"movie{i}")
+
+        monkeypatch.setattr("rest_framework_dso.paginator.get_estimated_count", lambda qs: 20_000)
+        response = api_client.get("/v1/movies", data={"_pageSize": 2})
+        data = read_response_json(response)
+        assert response.status_code == 200, data
+        assert data["page"]["totalElements"] == 20_000
+        assert data["page"]["countEstimated"] is True
+        assert response["X-Total-Count-Estimated"] == "true"
+
+        response = api_client.get("/v1/movies", data={"_pageSize": 2, "_count": "true"})
+        data = read_response_json(response)
+        assert "countEstimated" not in data["page"]
+        assert "X-Total-Count-Estimated" not in response
+
+    @staticmethod
+    def test_list_count_cache_tables():
+        """Prove that the cached count is invalidated by the tables of subqueries too."""
+        queryset = Movie.objects.filter(
+            category__in=Category.objects.filter(last_updated_by__in=MovieUser.objects.all())
+        )
+        assert get_query_tables(queryset.query) == {
+            Movie._meta.db_table,
+            Category._meta.db_table,
+            MovieUser._meta.db_table,
+        }
+
+    @staticmethod
+    @pytest.mark.django_db(transaction=True)
+    def test_list_count_deferred(api_client, settings):
+        """Prove that the count can run in a worker thread while the page is written.
+        This uses committed data, as the worker thread has its own database connection.
+        """
+        settings.DSO_DEFERRED_COUNT = True
+        for i in range(3):
+            Movie.objects.create(name=f"movie{i}")
+
+        response = api_client.get("/v1/movies", data={"_count": "true", "_pageSize": 2})
+        data = read_response_json(response)
+        assert response.status_code == 200, data
+        assert not response.has_header("X-Total-Count")
+        assert data["page"] == {"number": 1, "size": 2, "totalElements": 3, "totalPages": 2}
+
+    @staticmethod
+    @pytest.mark.django_db(transaction=True)
+    def test_list_count_deferred_connection():
+        """Prove that the worker thread closes its database connection after counting."""
+        Movie.objects.create(name="movie0")
+        result = {}
+
+        def _run():
+            result["count"] = _count_queryset(Movie.objects.all())
+            result["connection"] = connections["default"].connection
+
+        thread = Thread(target=_run)
+        thread.start()
+        thread.join()
+        assert result == {"count": 1, "connection": None}
+
+    @staticmethod
+    def test_list_count_invalid(api_client):
+        """Prove that invalid ?_count values are reported."""
+        api_client.raise_request_exception = False
+        response = api_client.get("/v1/movies", data={"_count": "foo"})
+        data = read_response_json(response)
+        assert response.status_code == 400, data
+
+
 @pytest.mark.django_db
 class TestLimitFields:
     """Prove that fields limiting works as expected."""
@@ -462,6 +704,23 @@ class TestLimitFields:
             {"name": "test", "date_added": None},
         ]
 
+    def test_limit_fields_defers_columns(self, api_client, category):
+        """Prove that the columns of omitted fields are not read from the database."""
+        Movie.objects.create(name="test", category=category, url="https://example.com/")
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(
+                "/v1/movies", data={"_fields": "name", "_expandScope": "category"}
+            )
+            data = read_response_json(response)
+
+        assert response.status_code == 200, data
+        assert data["_embedded"]["movie"] == [{"name": "test"}]
+        assert data["_embedded"]["category"] == [{"name": "bar"}]
+        sql = "\n".join(query["sql"] for query in context.captured_queries)
+        assert '"date_added"' not in sql
+        assert '"url"' not in sql
+
     def test_incorrect_field_in_fields_results_in_error(self, api_client):
         """Prove that adding invalid name to ?_fields will result in error"""
         Movie.objects.create(name="test")